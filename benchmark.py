@@ -0,0 +1,193 @@
+"""Benchmark image searches on saved screenshots, without the game running.
+
+Every template in images/ is searched for in every screenshot with a full
+search and with the pyramid search, and the results are compared. Use
+Inputs.save_screenshot() (or screenshot.py) to collect screenshots first,
+otherwise a few synthetic frames with the templates pasted in are used.
+
+With --breakdown, the stat breakdown slicing used by Misc.get_pow() and
+friends is compared with the original pixel by pixel version instead, on
+screenshots of the energy, magic or R3 breakdown.
+
+    python benchmark.py
+    python benchmark.py screenshots/01-01-20-12-00-00.png --threshold 0.9
+    python benchmark.py --breakdown screenshots/breakdown-*.png
+"""
+from classes.features import Misc
+from classes.inputs import Inputs
+from classes.templates import Templates
+
+import coordinates as coords
+
+import argparse
+import glob
+import os
+import time
+
+from PIL import Image as image
+import cv2
+import numpy
+
+parser = argparse.ArgumentParser()
+parser.add_argument("screenshots", nargs="*", help="screenshots to search, defaults to screenshots/*.png")
+parser.add_argument("-t", "--threshold", default=0.9, type=float, help="threshold used for every search")
+parser.add_argument("-l", "--levels", default=2, type=int, help="largest number of pyramid levels to try")
+parser.add_argument("-r", "--repeat", default=5, type=int, help="times to repeat every search")
+parser.add_argument("-b", "--breakdown", action="store_true", help="benchmark the stat breakdown slicing instead")
+args = parser.parse_args()
+
+
+def synthetic_frames(names :list, count :int =3) -> list:
+    """Return gray 960x600 frames with every template pasted in at random."""
+    rng = numpy.random.default_rng(0)
+    frames = []
+    for _ in range(count):
+        frame = cv2.GaussianBlur(rng.integers(0, 255, (600, 960), dtype=numpy.uint8), (9, 9), 0)
+        for name in names:
+            template = Templates.get(name)
+            h, w = template.shape
+            x, y = rng.integers(0, 960 - w), rng.integers(0, 600 - h)
+            frame[y:y + h, x:x + w] = template
+        frames.append(frame)
+    return frames
+
+
+def timed(frame :numpy.ndarray, name :str, pyramid :int):
+    """Return the match and the average time one search took."""
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        match = Inputs.match_template(frame, name, args.threshold, pyramid)
+    return match, (time.perf_counter() - start) / args.repeat
+
+
+def same(a, b) -> bool:
+    """Return whether two matches agree within tolerance."""
+    if a is None or b is None:
+        return a is b
+    return abs(a.x - b.x) <= 1 and abs(a.y - b.y) <= 1 and abs(a.score - b.score) <= 0.02
+
+
+def cutoff_right(bmp :image) -> image:
+    """Original version of Misc.__cutoff_right(), reading one pixel at a time."""
+    first_pix = bmp.getpixel((0, 0))
+    width, height = bmp.size
+    count = 0
+    for x in range(8, width):
+        dif = False
+        for y in range(0, height):
+            if not Inputs.rgb_equal(first_pix, bmp.getpixel((x, y))):
+                dif = True
+                break
+        if dif: count = 0
+        else:
+            count += 1
+            if count > 8:
+                return bmp.crop((0, 0, x, height))
+    return bmp
+
+
+def split_breakdown(bmp :image) -> list:
+    """Original version of Misc.__split_breakdown(), reading one pixel at a time."""
+    first_pix = bmp.getpixel((0, 0))
+    width, height = bmp.size
+    y1 = 1
+    offset_x = coords.OCR_BREAKDOWN_NUM[0] - coords.OCR_BREAKDOWN_COLONS[0]
+    slices = []
+    for _ in range(0, 3):
+        for y in range(y1, height):
+            if not Inputs.rgb_equal(first_pix, bmp.getpixel((0, y))):
+                y0 = y
+                break
+        for y in range(y0, height, coords.BREAKDOWN_OFFSET_Y):
+            if Inputs.rgb_equal(first_pix, bmp.getpixel((0, y))):
+                y1 = y
+                break
+        slices.append(cutoff_right(bmp.crop((offset_x, y0 - 8, width, y1))))
+    return slices
+
+
+def synthetic_breakdowns(count :int =20) -> list:
+    """Return breakdown areas with three sections of colons and numbers."""
+    rng = numpy.random.default_rng(0)
+    box = coords.OCR_BREAKDOWN_COLONS
+    offset_x = coords.OCR_BREAKDOWN_NUM[0] - box.x1
+    breakdowns = []
+    for _ in range(count):
+        pixels = numpy.full((box.y2 - box.y1, box.x2 - box.x1, 3), (236, 240, 241), dtype=numpy.uint8)
+        y = int(rng.integers(5, 30))
+        for _ in range(3):
+            for _ in range(int(rng.integers(1, 8))):
+                pixels[y:y + 3, :2] = pixels[y + 6:y + 9, :2] = 0
+                end = offset_x + int(rng.integers(10, 250))
+                pixels[y:y + 10, offset_x:end] = rng.integers(0, 255, (10, end - offset_x, 1))
+                y += coords.BREAKDOWN_OFFSET_Y
+            y += int(rng.integers(5, 40))
+        breakdowns.append(image.fromarray(pixels))
+    return breakdowns
+
+
+def benchmark_breakdown() -> None:
+    """Compare the numpy breakdown slicing with the original version."""
+    if args.screenshots:
+        box = coords.OCR_BREAKDOWN_COLONS
+        breakdowns = [image.open(path).convert("RGB").crop(box) for path in args.screenshots]
+    else:
+        print("No screenshots given, using synthetic breakdowns")
+        breakdowns = synthetic_breakdowns()
+    
+    split = getattr(Misc, "_Misc__split_breakdown")
+    original = current = 0.0
+    differ = 0
+    for i, bmp in enumerate(breakdowns):
+        start = time.perf_counter()
+        expected = split_breakdown(bmp)
+        original += time.perf_counter() - start
+        start = time.perf_counter()
+        slices = split(bmp)
+        current += time.perf_counter() - start
+        if not all(numpy.array_equal(numpy.asarray(a), numpy.asarray(b))
+                   for a, b in zip(slices, expected)):
+            differ += 1
+            print(f"Breakdown {i} differs: {[s.size for s in slices]} instead of {[s.size for s in expected]}")
+    
+    print(f"{len(breakdowns)} breakdowns, {differ} differ")
+    print(f"original: {original / len(breakdowns) * 1000:.2f}ms per breakdown")
+    print(f"numpy:    {current / len(breakdowns) * 1000:.2f}ms per breakdown, {original / current:.0f}x faster")
+
+
+def benchmark_search() -> None:
+    """Compare pyramid searches with full searches."""
+    Templates.preload()
+    names = sorted(os.path.basename(path) for path, _ in Templates.cache)
+    paths = args.screenshots or sorted(glob.glob(os.path.join("screenshots", "*.png")))
+    if paths:
+        frames = [cv2.imread(path, cv2.IMREAD_GRAYSCALE) for path in paths]
+    else:
+        print("No screenshots found, using synthetic frames")
+        frames = synthetic_frames(names)
+
+    totals = {level: 0.0 for level in range(args.levels + 1)}
+    mismatches = {level: 0 for level in range(1, args.levels + 1)}
+    for frame in frames:
+        for name in names:
+            reference, elapsed = timed(frame, name, 0)
+            totals[0] += elapsed
+            for level in range(1, args.levels + 1):
+                match, elapsed = timed(frame, name, level)
+                totals[level] += elapsed
+                if not same(reference, match):
+                    mismatches[level] += 1
+                    print(f"Level {level} differs for {name}: {match} instead of {reference}")
+
+    searches = len(frames) * len(names)
+    print(f"{searches} searches of {len(names)} templates in {len(frames)} frames")
+    print(f"full search: {totals[0] / searches * 1000:.2f}ms per search")
+    for level in range(1, args.levels + 1):
+        print(f"pyramid {level}:   {totals[level] / searches * 1000:.2f}ms per search, "
+              f"{totals[0] / totals[level]:.1f}x faster, {mismatches[level]} differ")
+
+
+if args.breakdown:
+    benchmark_breakdown()
+else:
+    benchmark_search()
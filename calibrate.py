@@ -0,0 +1,106 @@
+"""Measure how fast the game reacts to each kind of click on this machine.
+
+The results are written to timings.json, which Inputs loads on startup and
+uses instead of the fixed sleeps for menus, the number input box, abilities
+and inventory clicks. Start it with the game open, in an adventure zone
+with an enemy, so the abilities can be measured as well.
+
+    python calibrate.py
+    python calibrate.py --actions menu input --trials 20
+"""
+from classes.helper     import Helper
+from classes.inputs     import Inputs
+from classes.navigation import Navigation
+from classes.window     import Window
+
+import coordinates as coords
+import usersettings as userset
+
+import argparse
+import statistics
+import time
+
+ACTIONS = ["menu", "input", "ability", "inventory"]
+ABILITY_AREA = coords.OCRBox(coords.ABILITY_ROW1X - 10, coords.ABILITY_ROW1Y - 5,
+                             coords.ABILITY_ROW1X + 10, coords.ABILITY_ROW1Y + 5)
+CUBE = coords.EQUIPMENT_SLOTS["cube"]
+CUBE_AREA = coords.OCRBox(CUBE.x - 20, CUBE.y - 20, CUBE.x + 20, CUBE.y + 20)
+
+parser = argparse.ArgumentParser()
+parser.add_argument("-a", "--actions", nargs="+", choices=ACTIONS, default=ACTIONS, help="action classes to measure")
+parser.add_argument("-t", "--trials", default=10, type=int, help="number of times to measure each action")
+parser.add_argument("-m", "--margin", default=1.5, type=float, help="multiply the slowest reaction by this")
+args = parser.parse_args()
+
+
+def react(area :coords.OCRBox, click, timeout :float =2) -> float:
+    """Click and return how long it took for the area to settle, None if it never changed."""
+    area = Window.gameCoords(*area)
+    Inputs.invalidate_frame()
+    before = Inputs.region_hash(*area)
+    start = time.time()
+    click()
+    if not Inputs.wait_settle(*area, timeout, before=before):
+        return None
+    return time.time() - start
+
+
+def wait_ability_ready(timeout :float =5) -> bool:
+    """Wait until the regular attack can be used again."""
+    end = time.time() + timeout
+    while time.time() < end:
+        Inputs.invalidate_frame()
+        if Inputs.check_pixel_color(*coords.COLOR_REGULAR_ATTACK_READY):
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def measure(action :str, trial :int) -> float:
+    """Measure one click of the action class, see react()."""
+    if action == "menu":
+        menu = ["inventory", "augmentations"][trial % 2]
+        return react(coords.MENU_AREA, lambda: Inputs.click(*coords.MENU_ITEMS[menu], fast=True))
+
+    if action == "input":
+        def click():
+            Inputs.click(*coords.NUMBER_INPUT_BOX, fast=True)
+            Inputs.send_string(trial + 1)
+        return react(coords.NUMBER_INPUT_AREA, click)
+
+    if action == "ability":
+        Navigation.menu("adventure")
+        if not wait_ability_ready():
+            return None
+        return react(ABILITY_AREA, lambda: Inputs.click(coords.ABILITY_ROW1X, coords.ABILITY_ROW1Y, fast=True))
+
+    Navigation.menu("inventory")
+    return react(CUBE_AREA, lambda: Inputs.click(*CUBE, "right", fast=True))
+
+
+Helper.init(True)
+timings = dict(Inputs.timings)
+for action in args.actions:
+    latencies = []
+    for trial in range(args.trials):
+        latency = measure(action, trial)
+        if latency is not None:
+            latencies.append(latency)
+        time.sleep(userset.SHORT_SLEEP)
+    Navigation.current_menu = ''
+
+    if len(latencies) < args.trials // 2:
+        print(f"{action}: the game only reacted {len(latencies)}/{args.trials} times, keeping the current delay")
+        continue
+
+    # Menus wait for the screen to settle, the others sleep until their last change
+    if action != "menu":
+        latencies = [max(0, t - getattr(userset, "SETTLE_TIME", 0.05)) for t in latencies]
+    delay = round(max(0, max(latencies) * args.margin - userset.FAST_SLEEP), 3)
+    timings[action] = delay
+    print(f"{action}: min {min(latencies):.3f}s, median {statistics.median(latencies):.3f}s, "
+          f"max {max(latencies):.3f}s, delay after click {delay:.3f}s")
+
+Inputs.click(*coords.WASTE_CLICK)
+Inputs.save_timings(timings)
+print(f"Saved timings to {Inputs.timings_file}")
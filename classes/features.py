@@ -6,17 +6,21 @@ import re
 import time
 
 from collections import deque, namedtuple
-from typing      import Dict, List, Tuple
+from typing      import Dict, Iterable, List, Tuple
 from PIL.Image   import Image as PILImage
 
 from deprecated import deprecated
+import cv2
+import numpy
 
 import constants    as const
 import coordinates  as coords
 import usersettings as userset
 
 from classes.inputs     import Inputs
+from classes.macro      import Macro
 from classes.navigation import Navigation
+from classes.slots      import Slots
 from classes.window     import Window
 
 
@@ -25,7 +29,7 @@ class FightBoss:
     def get_current_boss() -> int:
         """Go to fight and read current boss number."""
         Navigation.menu("fight")
-        boss = Inputs.ocr(*coords.OCR_BOSS, debug=False)
+        boss = Inputs.ocr(*coords.OCR_BOSS, glyphs=True)
         return Inputs.remove_letters(boss)
 
     @staticmethod
@@ -123,6 +127,15 @@ class Adventure:
     itopod_ap_gained = 0
     itopod_kills = 0
 
+    # Enters the optimal ITOPOD floor from the adventure menu
+    itopod_auto_macro = Macro("itopod_auto", [
+        Macro.click(*coords.ITOPOD, gap=userset.MEDIUM_SLEEP),
+        Macro.click(*coords.ITOPOD_END),
+        # set end to 0 in case it's higher than start
+        Macro.keys("0"),
+        Macro.click(*coords.ITOPOD_AUTO),
+        Macro.click(*coords.ITOPOD_ENTER, gap=userset.MEDIUM_SLEEP),
+    ], checks=[coords.IS_ITOPOD_ACTIVE])
     mega_buff_unlocked = False
     oh_shit_unlocked = False
 
@@ -143,14 +156,10 @@ class Adventure:
             Inputs.click(*coords.ABILITY_IDLE_MODE)
         if itopod or itopodauto:
             Adventure.current_adventure_zone = 0
-            Inputs.click(*coords.ITOPOD)
             if itopodauto:
-                Inputs.click(*coords.ITOPOD_END)
-                # set end to 0 in case it's higher than start
-                Inputs.send_string("0")
-                Inputs.click(*coords.ITOPOD_AUTO)
-                Inputs.click(*coords.ITOPOD_ENTER)
+                Adventure.itopod_auto_macro.run()
                 return
+            Inputs.click(*coords.ITOPOD)
             Inputs.click(*coords.ITOPOD_START)
             Inputs.send_string(str(itopod))
             Inputs.click(*coords.ITOPOD_END)
@@ -210,36 +219,37 @@ class Adventure:
             Inputs.click(*coords.ABILITY_IDLE_MODE)
         
         end = time.time() + duration * 60
-        while time.time() < end:
-            if fast:
-                Inputs.click(*coords.ABILITY_REGULAR_ATTACK, fast=True)
-                continue
+        with Inputs.capturing():
+            while time.time() < end:
+                if fast:
+                    Inputs.click(*coords.ABILITY_REGULAR_ATTACK, fast=True)
+                    continue
 
-            Inputs.click(625, 500)  # click somewhere to move tooltip
-            if not Inputs.check_pixel_color(*coords.IS_DEAD):
-                if bosses:
-                    if Inputs.check_pixel_color(*coords.IS_BOSS_CROWN):
-                        enemy_alive = True
+                Inputs.click(625, 500)  # click somewhere to move tooltip
+                if not Inputs.check_pixel_color(*coords.IS_DEAD):
+                    if bosses:
+                        if Inputs.check_pixel_color(*coords.IS_BOSS_CROWN):
+                            enemy_alive = True
+                            if manual:
+                                Adventure.kill_enemy()
+                            else:
+                                while enemy_alive:
+                                    enemy_alive = not Inputs.check_pixel_color(*coords.IS_DEAD)
+                                    if Inputs.check_pixel_color(*coords.COLOR_REGULAR_ATTACK_READY):
+                                        Inputs.click(*coords.ABILITY_REGULAR_ATTACK)
+                                    time.sleep(0.1)
+                            if once:
+                                break
+                        else:
+                            # Send left arrow and right arrow to refresh monster.
+                            Inputs.send_arrow_press(left=True)
+                            Inputs.send_arrow_press(left=False)
+                    else:
                         if manual:
                             Adventure.kill_enemy()
                         else:
-                            while enemy_alive:
-                                enemy_alive = not Inputs.check_pixel_color(*coords.IS_DEAD)
-                                if Inputs.check_pixel_color(*coords.COLOR_REGULAR_ATTACK_READY):
-                                    Inputs.click(*coords.ABILITY_REGULAR_ATTACK)
-                                time.sleep(0.1)
-                        if once:
-                            break
-                    else:
-                        # Send left arrow and right arrow to refresh monster.
-                        Inputs.send_arrow_press(left=True)
-                        Inputs.send_arrow_press(left=False)
-                else:
-                    if manual:
-                        Adventure.kill_enemy()
-                    else:
-                        Inputs.click(*coords.ABILITY_REGULAR_ATTACK)
-            time.sleep(0.01)
+                            Inputs.click(*coords.ABILITY_REGULAR_ATTACK)
+                time.sleep(0.01)
         
         Inputs.click(*coords.ABILITY_IDLE_MODE)
     
@@ -275,15 +285,16 @@ class Adventure:
         if Inputs.check_pixel_color(*coords.IS_IDLE):
             Inputs.click(*coords.ABILITY_IDLE_MODE)
         
-        while time.time() < end:
-            if fast:
-                Inputs.click(*coords.ABILITY_REGULAR_ATTACK, fast=True)
-                continue
-            if (Inputs.check_pixel_color(*coords.IS_ENEMY_ALIVE) and
-               Inputs.check_pixel_color(*coords.COLOR_REGULAR_ATTACK_READY)):
-                Inputs.click(*coords.ABILITY_REGULAR_ATTACK)
-            else:
-                time.sleep(0.01)
+        with Inputs.capturing():
+            while time.time() < end:
+                if fast:
+                    Inputs.click(*coords.ABILITY_REGULAR_ATTACK, fast=True)
+                    continue
+                if (Inputs.check_pixel_color(*coords.IS_ENEMY_ALIVE) and
+                   Inputs.check_pixel_color(*coords.COLOR_REGULAR_ATTACK_READY)):
+                    Inputs.click(*coords.ABILITY_REGULAR_ATTACK)
+                else:
+                    time.sleep(0.01)
         
         Inputs.click(*coords.ABILITY_IDLE_MODE)
     
@@ -315,8 +326,8 @@ class Adventure:
                 x = coords.ABILITY_ROW3X + (ability - 11) * coords.ABILITY_OFFSETX
                 y = coords.ABILITY_ROW3Y
             
-            Inputs.click(x, y)
-            time.sleep(userset.LONG_SLEEP)
+            Inputs.click(x, y, fast=True)
+            time.sleep(Inputs.delay("ability", userset.MEDIUM_SLEEP - userset.FAST_SLEEP + userset.LONG_SLEEP))
             color = Inputs.get_pixel_color(coords.ABILITY_ROW1X,
                                            coords.ABILITY_ROW1Y)
             
@@ -428,8 +439,8 @@ class Adventure:
                 x = coords.ABILITY_ROW3X + (ability - 11) * coords.ABILITY_OFFSETX
                 y = coords.ABILITY_ROW3Y
             
-            Inputs.click(x, y)
-            time.sleep(userset.LONG_SLEEP)
+            Inputs.click(x, y, fast=True)
+            time.sleep(Inputs.delay("ability", userset.MEDIUM_SLEEP - userset.FAST_SLEEP + userset.LONG_SLEEP))
             color = Inputs.get_pixel_color(coords.ABILITY_ROW1X,
                                            coords.ABILITY_ROW1Y)
             
@@ -444,35 +455,41 @@ class Adventure:
         ready = []
         queue = []
         
-        # Add all abilities that are ready to the ready array
+        # Collect the ready pixel of every ability so they can be read at once
+        slots = []
         for i in range(1, 16):
             if i <= 4:
                 x = coords.ABILITY_ROW1X + i * coords.ABILITY_OFFSETX
                 y = coords.ABILITY_ROW1Y
-                color = Inputs.get_pixel_color(x, y)
-                if color == coords.ABILITY_ROW1_READY_COLOR:
-                    ready.append(i)
+                slots.append(coords.ColorPixel(x, y, coords.ABILITY_ROW1_READY_COLOR))
             if i >= 5 and i <= 10:
                 if Adventure.mega_buff_unlocked and i == 6:
+                    slots.append(None)
                     continue
                 x = coords.ABILITY_ROW2X + (i - 5) * coords.ABILITY_OFFSETX
                 y = coords.ABILITY_ROW2Y
-                color = Inputs.get_pixel_color(x, y)
-                if color == coords.ABILITY_ROW2_READY_COLOR:
-                    ready.append(i)
+                slots.append(coords.ColorPixel(x, y, coords.ABILITY_ROW2_READY_COLOR))
             if i > 10:
                 x = coords.ABILITY_ROW3X + (i - 11) * coords.ABILITY_OFFSETX
                 y = coords.ABILITY_ROW3Y
-                color = Inputs.get_pixel_color(x, y)
-                if color == coords.ABILITY_ROW3_READY_COLOR:
-                    ready.append(i)
+                slots.append(coords.ColorPixel(x, y, coords.ABILITY_ROW3_READY_COLOR))
+        
+        pixels = [slot for slot in slots if slot is not None]
+        colors = Inputs.get_pixel_colors(pixels + [coords.PLAYER_HEAL_THRESHOLD])
+        heal_color = colors.pop()
+        colors = iter(colors)
+        
+        # Add all abilities that are ready to the ready array
+        for i, slot in enumerate(slots, start=1):
+            if slot is not None and next(colors) == slot.color:
+                ready.append(i)
         
         if 15 in ready:
             Adventure.oh_shit_unlocked = True
         if 14 in ready:
             Adventure.mega_buff_unlocked = True
         # heal if we need to heal
-        if Inputs.check_pixel_color(*coords.PLAYER_HEAL_THRESHOLD):
+        if heal_color == coords.PLAYER_HEAL_THRESHOLD.color:
             if 15 in ready:
                 queue.append(15)
             elif 12 in ready:
@@ -593,7 +610,8 @@ class Inventory:
     def boost_cube() -> None:
         """Boost cube."""
         Navigation.menu("inventory")
-        Inputs.click(*coords.EQUIPMENT_SLOTS["cube"], "right")
+        Inputs.click(*coords.EQUIPMENT_SLOTS["cube"], "right", fast=True)
+        time.sleep(Inputs.delay("inventory", userset.MEDIUM_SLEEP - userset.FAST_SLEEP))
     
     @staticmethod
     def loadout(target :int) -> None:
@@ -666,19 +684,29 @@ class Inventory:
         consume   -- Set to true if item is consumable instead.
         """
         Navigation.menu("inventory")
+        template = "consumable.png" if consume else "transformable.png"
+        # Items whose tooltip didn't match earlier this run are skipped
+        fingerprint = Slots.fingerprint(Slots.get_icon(slot))
+        known = Slots.get_property(fingerprint, template)
+        if known is False:
+            return
+        
+        # The tooltip shows up next to the slot, so every slot has its own spot
+        key = f"{template} {slot}"
         slot = Inventory.get_inventory_slots(slot)[-1]
         Inputs.click(*slot)
         time.sleep(userset.SHORT_SLEEP)
+        coord = Inputs.image_search(Window.x, Window.y, Window.x + 960, Window.y + 600,
+                                    template, threshold, pyramid=1, key=key)
+        if coord is None:
+            # A known item whose tooltip was late is tried again next time
+            if known is None:
+                Slots.set_property(fingerprint, template, False)
+            return
         
-        if consume:
-            coord = Inputs.image_search(Window.x, Window.y, Window.x + 960, Window.y + 600,
-                                        Inputs.get_file_path("images", "consumable.png"), threshold)
-        else:
-            coord = Inputs.image_search(Window.x, Window.y, Window.x + 960, Window.y + 600,
-                                        Inputs.get_file_path("images", "transformable.png"), threshold)
-        
-        if coord:
-            Inputs.ctrl_click(*slot)
+        if known is None:
+            Slots.set_property(fingerprint, template, True)
+        Inputs.ctrl_click(*slot)
 
 class Augmentation:
     @staticmethod
@@ -1003,11 +1031,9 @@ class NGU:
         
         for target in targets:
             energy = 0
-            for x in range(198):
-                color = Inputs.get_pixel_color(coords.NGU_BAR_MIN.x + x,
-                                               coords.NGU_BAR_MIN.y +
-                                               coords.NGU_BAR_OFFSET_Y * target,
-                                               )
+            y = coords.NGU_BAR_MIN.y + coords.NGU_BAR_OFFSET_Y * target
+            colors = Inputs.get_pixel_colors([(coords.NGU_BAR_MIN.x + x, y) for x in range(198)])
+            for x, color in enumerate(colors):
                 if color == coords.NGU_BAR_WHITE:
                     pixel_coefficient = x / 198
                     value_coefficient = overcap / pixel_coefficient
@@ -1161,11 +1187,10 @@ class Questing:
         """Check for items in inventory that can be turned in."""
         Navigation.menu("inventory")
         Inputs.click(*coords.INVENTORY_PAGE[0])
-        bmp = Inputs.get_bitmap()
+        found = Slots.find(coords.QUESTING_FILENAMES)
         for item in coords.QUESTING_FILENAMES:
-            path = Inputs.get_file_path("images", item)
-            loc = Inputs.image_search(Window.x, Window.y, Window.x + 960, Window.y + 600, path, 0.91, bmp=bmp)
-            if loc:
+            if found[item]:
+                loc = Slots.center(found[item][0])
                 Inputs.click(*loc, button="right")
                 if cleanup:
                     Inputs.send_string("d")
@@ -1280,14 +1305,14 @@ class Questing:
                     current_time = time.time()
                     if coords.QUESTING_QUEST_COMPLETE in text.lower():
                         try:
-                            start_qp = int(Inputs.remove_letters(Inputs.ocr(*coords.OCR_QUESTING_QP)))
+                            start_qp = int(Inputs.remove_letters(Inputs.ocr(*coords.OCR_QUESTING_QP, glyphs=True)))
                         except ValueError:
                             print("Couldn't fetch current QP")
                             start_qp = 0
                         Questing.start_complete()
                         Inputs.click(605, 510)  # move tooltip
                         try:
-                            current_qp = int(Inputs.remove_letters(Inputs.ocr(*coords.OCR_QUESTING_QP)))
+                            current_qp = int(Inputs.remove_letters(Inputs.ocr(*coords.OCR_QUESTING_QP, glyphs=True)))
                         except ValueError:
                             print("Couldn't fetch current QP")
                             current_qp = 0
@@ -1350,12 +1375,13 @@ class SelloutShop:
         AP and you currently have 0 muffins.
         """
         Navigation.sellout_boost_2()
-        muffin_status = Inputs.ocr(*coords.OCR_MUFFIN).lower()
+        muffin_status, ap_text = Inputs.ocr_many([coords.OCR_MUFFIN, coords.OCR_AP])
+        muffin_status = muffin_status.text.lower()
         if "have: 0" in muffin_status and "inactive" in muffin_status:
             print(muffin_status)
             if buy:
                 try:
-                    ap = int(Inputs.remove_letters(Inputs.ocr(*coords.OCR_AP)))
+                    ap = int(Inputs.remove_letters(ap_text.text))
                 except ValueError:
                     print("Couldn't get current AP")
                 if ap >= 50000:
@@ -1370,17 +1396,28 @@ class SelloutShop:
         print(f"Used MacGuffin Muffin at: {datetime.datetime.now()}")
 
 class Rebirth:
+    # Stops fighting bosses and rebirths from the fight boss menu
+    # The rebirth timer in the sidebar starts over once the rebirth went through
+    rebirth_macro = Macro("rebirth", [
+        Macro.click(*coords.FIGHT_STOP, gap=userset.MEDIUM_SLEEP),
+        Macro.click(*coords.REBIRTH, gap=userset.LONG_SLEEP),
+        Macro.click(*coords.REBIRTH_BUTTON, gap=userset.MEDIUM_SLEEP),
+        Macro.click(*coords.CONFIRM, gap=userset.MEDIUM_SLEEP),
+    ], [lambda: Rebirth.rt_to_seconds() < 60])
+
     @staticmethod
-    def do_rebirth() -> None:
-        """Start a rebirth or challenge."""
+    def do_rebirth() -> bool:
+        """Start a rebirth or challenge, returns whether it went through."""
         Navigation.menu("fight")
-        Inputs.click(*coords.FIGHT_STOP)
-        Navigation.rebirth()
+        if not Rebirth.rebirth_macro.run():
+            print("Rebirth didn't go through")
+            Navigation.current_menu = ''
+            return False
         Adventure.current_adventure_zone = 0
-        Inputs.click(*coords.REBIRTH)
-        Inputs.click(*coords.REBIRTH_BUTTON)
-        Inputs.click(*coords.CONFIRM)
-        return
+        Navigation.current_menu = 'rebirth'
+        Navigation.input_box_value = None
+        Misc.breakdowns = {}
+        return True
     
     @staticmethod
     def check_challenge(getNum :bool =False) -> int:
@@ -1392,8 +1429,7 @@ class Rebirth:
                    If False or omitted, return if a challenge is active.
         """
         Navigation.rebirth()
-        Inputs.click(*coords.CHALLENGE_BUTTON)
-        time.sleep(userset.LONG_SLEEP)
+        Navigation.click_settle(*coords.CHALLENGE_BUTTON, userset.LONG_SLEEP)
         active = Inputs.check_pixel_color(*coords.COLOR_CHALLENGE_ACTIVE)
         
         if not active:
@@ -1436,7 +1472,7 @@ class Rebirth:
         time.struct_time object.
         """
         Rebirth_time = namedtuple('Rebirth_time', 'days timestamp')
-        t = Inputs.ocr(*coords.OCR_REBIRTH_TIME)
+        t = Inputs.ocr(*coords.OCR_REBIRTH_TIME, glyphs=True)
         x = re.search(r"((?P<days>[0-9]+) days? )?((?P<hours>[0-9]+):)?(?P<minutes>[0-9]+):(?P<seconds>[0-9]+)", t)
         days = 0
         if x is None:
@@ -1471,7 +1507,16 @@ class Rebirth:
         seconds = ((rt.days * 24 + rt.timestamp.tm_hour) * 60 + rt.timestamp.tm_min) * 60 + rt.timestamp.tm_sec
         return seconds
 
+# Stat breakdown values read by Misc.get_breakdown(). power, bars and cap are
+# tuples of the energy, magic and R3 values, None for the ones not read. time
+# is when the oldest of the values was read.
+Breakdown = namedtuple("Breakdown", "power bars cap wish_speed time")
+
 class Misc:
+    # Breakdown tab (resource number or "wish speed") -> (values, time read),
+    # see get_breakdown()
+    breakdowns = {}
+    
     @staticmethod
     def reclaim_all() -> None:
         """Reclaim all resources from all features."""
@@ -1555,47 +1600,47 @@ class Misc:
             Inputs.click(*coords.SAVE)
         return
     
+    # mask of the pixels in a breakdown image that have the background color
+    @staticmethod
+    def __background_mask(bmp) -> numpy.ndarray:
+        pixels = numpy.ascontiguousarray(numpy.asarray(bmp)[..., :3])
+        return cv2.inRange(pixels, pixels[0, 0], pixels[0, 0]) > 0
+    
     # crops the misc breakdown image, cutting off empty space on the right
+    # at the first 9 columns from x = 8 on that only hold the background color
     @staticmethod
     def __cutoff_right(bmp) -> PILImage:
-        first_pix = bmp.getpixel((0, 0))
         width, height = bmp.size
+        if width < 17:
+            return bmp
+        if height:
+            empty = Misc.__background_mask(bmp)[:, 8:].min(axis=0)
+        else:
+            empty = numpy.ones(width - 8, dtype=bool)
         
-        count = 0
-        for x in range(8, width):
-            dif = False
-            for y in range(0, height):
-                if not Inputs.rgb_equal(first_pix, bmp.getpixel((x, y))):
-                    dif = True
-                    break
-            
-            if dif: count = 0
-            else:
-                count += 1
-                if count > 8:
-                    return bmp.crop((0, 0, x , height))
+        runs = numpy.convolve(empty, numpy.ones(9, dtype=int), "valid")
+        full = numpy.flatnonzero(runs == 9)
+        if full.size:
+            return bmp.crop((0, 0, int(full[0]) + 16, height))
         
         return bmp
     
     # splits the three parts of the resource breakdown (pow, bars, cap)
+    # by the background colored gaps in the first column
     @staticmethod
     def __split_breakdown(bmp) -> List[PILImage]:
-        first_pix = bmp.getpixel((0, 0))
         width, height = bmp.size
-        y1 = 1
+        background = Misc.__background_mask(bmp)[:, 0]
+        y0 = y1 = 1
         offset_x = coords.OCR_BREAKDOWN_NUM[0] - coords.OCR_BREAKDOWN_COLONS[0]
         
         slices = []
         for _ in range(0, 3):
-            for y in range(y1, height):
-                if not Inputs.rgb_equal(first_pix, bmp.getpixel((0, y))):
-                    y0 = y
-                    break
+            text = numpy.flatnonzero(~background[y1:])
+            if text.size: y0 = y1 + int(text[0])
             
-            for y in range(y0, height, coords.BREAKDOWN_OFFSET_Y):
-                if Inputs.rgb_equal(first_pix, bmp.getpixel((0, y))):
-                    y1 = y
-                    break
+            gap = numpy.flatnonzero(background[y0::coords.BREAKDOWN_OFFSET_Y])
+            if gap.size: y1 = y0 + int(gap[0]) * coords.BREAKDOWN_OFFSET_Y
             
             slice = bmp.crop((offset_x, y0 - 8, width, y1))
             slices.append(Misc.__cutoff_right(slice))
@@ -1620,50 +1665,173 @@ class Misc:
         if debug: bmp.show()
 
         imgs = Misc.__split_breakdown(bmp)
+        if debug:
+            for img in imgs: img.show()
         
         ress = []
-        for img in imgs:
-            if debug: img.show()
-            s = Inputs.ocr(0, 0, 0, 0, bmp=img, debug=ocrDebug, binf=220, sliced=True)
+        for s in Inputs.ocr_bitmaps(imgs, debug=ocrDebug, binf=220, sliced=True):
             s = s.splitlines()
             s2 = [x for x in s if x != ""]  # remove empty lines
             ress.append(s2)
         
         return ress
     
-    # Gets the numbers on stats breakdown for the resource and value passed
-    # val = 0 for power, 1 for bars and 2 for cap
+    # Gets the power, bars and cap from the last line of each section of
+    # the resource's stat breakdown, None for the ones OCR couldn't read
     @staticmethod
-    def __get_res_val(resource, val) -> int:
-        s = Misc.__get_res_breakdown(resource)[val][-1]
-        return Inputs.get_numbers(s)[0]
+    def __get_res_vals(resource) -> Tuple[int, int, int]:
+        vals = []
+        for lines in Misc.__get_res_breakdown(resource):
+            try:
+                vals.append(Inputs.get_numbers(lines[-1])[0])
+            except IndexError:
+                vals.append(None)
+        vals += [None] * (3 - len(vals))
+        return tuple(vals)
+    
+    # Goes to the misc stat breakdown and gets the total wish speed,
+    # None if OCR couldn't find it
+    @staticmethod
+    def __get_wish_speed() -> float:
+        Navigation.stat_breakdown()
+        Navigation.click_settle(*coords.BREAKDOWN_MISC, userset.MEDIUM_SLEEP, coords.OCR_BREAKDOWN)
+        Inputs.click_drag(*coords.BREAKDOWN_MISC_SCROLL_DRAG_START, *coords.BREAKDOWN_MISC_SCROLL_DRAG_END)
+        for field, value in Misc.parse_breakdown(Inputs.ocr(*coords.OCR_BREAKDOWN)):
+            if field.lower() == "total wish speed:":
+                try:
+                    return int(value) / 100
+                except ValueError:
+                    return None
+        return None
+    
+    @staticmethod
+    def parse_breakdown(text :str) -> List[Tuple[str, str]]:
+        """Pair the fields and values in the OCR text of a stat breakdown.
+        
+        Returns a list of (field, value) tuples, or an empty list if the
+        fields and values don't line up.
+        """
+        try:
+            fields = []
+            values = []
+            res = []
+            method = 0
+            for line in text.splitlines():
+                match = re.search(r"[a-zA-Z\s]+:\s*[xX]\s*\d+\%?", line)
+                if match is not None:
+                    method = 1
+                    break
+            if method == 1:
+                for line in text.splitlines():
+                    if line == "":
+                        continue
+                    else:
+                        match = re.match(r"(^[a-zA-Z\s]+:?)", line)
+                        if match is not None:
+                            fields.append(match.group(1))
+                            values.append(Inputs.remove_letters(line))
+            else:
+                for line in text.splitlines():
+
+                    if line == "" or line[0].lower() == "x":
+                        continue
+                    if line[0].isdigit():
+                        values.append(re.sub(r'[^0-9E+\.]', '', line))
+                    else:
+                        fields.append(line)
+            assert len(fields) == len(values)
+
+            for index, field in enumerate(fields):
+                res.append((field, values[index]))
+            return res
+
+        except AssertionError:
+            print("OCR couldn't determine breakdown values")
+            return []
+    
+    @staticmethod
+    def get_breakdown(resources :Iterable[int] =(1, 2, 3), wish_speed :bool =False,
+                      max_age :float =None) -> Breakdown:
+        """Get the power, bars and cap of several resources at once.
+        
+        Every breakdown tab is visited once, and all three values are read
+        from it. Values are remembered, reading them again within max_age
+        seconds doesn't leave the current menu. Rebirthing forgets them.
+        Values that couldn't be read are None, and are read again next time.
+        
+        Keyword arguments
+        resources  -- The resources to read. 1 for energy, 2 for magic and 3
+                      for r3.
+        wish_speed -- Also read the total wish speed from the misc breakdown,
+                      as a fraction (1.0 is 100%).
+        max_age    -- How old remembered values may be, in seconds. Defaults
+                      to userset.BREAKDOWN_MAX_AGE, 0 always reads them again.
+        """
+        if max_age is None:
+            max_age = getattr(userset, "BREAKDOWN_MAX_AGE", 0)
+        tabs = list(resources) + (["wish speed"] if wish_speed else [])
+        power, bars, cap = [None] * 3, [None] * 3, [None] * 3
+        speed = None
+        oldest = time.time()
+        for tab in tabs:
+            if tab not in (1, 2, 3, "wish speed"):
+                raise RuntimeError("Invalid resource")
+            cached = Misc.breakdowns.get(tab)
+            if cached is not None and time.time() - cached[1] <= max_age:
+                vals, read = cached
+            else:
+                if tab == "wish speed":
+                    vals = Misc.__get_wish_speed()
+                else:
+                    vals = Misc.__get_res_vals(tab)
+                read = time.time()
+                if vals is None or (tab != "wish speed" and None in vals):
+                    Misc.breakdowns.pop(tab, None)
+                else:
+                    Misc.breakdowns[tab] = (vals, read)
+            
+            oldest = min(oldest, read)
+            if tab == "wish speed":
+                speed = vals
+            else:
+                power[tab - 1], bars[tab - 1], cap[tab - 1] = vals
+        return Breakdown(tuple(power), tuple(bars), tuple(cap), speed, oldest)
+    
+    # Gets one value of a resource's breakdown, raises IndexError if OCR
+    # couldn't read it
+    @staticmethod
+    def __get_res_val(resource :int, field :str) -> int:
+        val = getattr(Misc.get_breakdown((resource,)), field)[resource - 1]
+        if val is None:
+            raise IndexError(f"couldn't read the {field} of resource {resource}")
+        return val
     
     @staticmethod
     def get_pow(resource :int) -> int:
-        """Get the power for energy, magic, or resource 3.
+        """Get the power for energy, magic, or resource 3, see get_breakdown().
         
         Keyword arguments
         resource -- The resource to get power for. 1 for energy, 2 for magic and 3 for r3.
         """
-        return Misc.__get_res_val(resource, 0)
+        return Misc.__get_res_val(resource, "power")
     
     @staticmethod
     def get_bars(resource :int) -> int:
-        """Get the bars for energy, magic, or resource 3.
+        """Get the bars for energy, magic, or resource 3, see get_breakdown().
         
         Keyword arguments
         resource -- The resource to get bars for. 1 for energy, 2 for magic and 3 for r3.
         """
-        return Misc.__get_res_val(resource, 1)
+        return Misc.__get_res_val(resource, "bars")
     
     @staticmethod
     def get_cap(resource :int) -> int:
-        """Get the cap for energy, magic, or resource 3.
+        """Get the cap for energy, magic, or resource 3, see get_breakdown().
         
         Keyword arguments
         resource -- The resource to get cap for. 1 for energy, 2 for magic and 3 for r3.
         """
-        return Misc.__get_res_val(resource, 2)
+        return Misc.__get_res_val(resource, "cap")
     
     @staticmethod
     def get_idle_cap(resource :int) -> int:
@@ -1674,9 +1842,9 @@ class Misc:
         """
         try:  # The sliced argument was meant for low values with get_pow/bars/cap
             # But also serves for low idle caps
-            if   resource == 1: res = Inputs.ocr(*coords.OCR_ENERGY, sliced=True)
-            elif resource == 2: res = Inputs.ocr(*coords.OCR_MAGIC , sliced=True)
-            elif resource == 3: res = Inputs.ocr(*coords.OCR_R3    , sliced=True)
+            if   resource == 1: res = Inputs.ocr(*coords.OCR_ENERGY, sliced=True, glyphs=True)
+            elif resource == 2: res = Inputs.ocr(*coords.OCR_MAGIC , sliced=True, glyphs=True)
+            elif resource == 3: res = Inputs.ocr(*coords.OCR_R3    , sliced=True, glyphs=True)
             else : raise RuntimeError("Invalid resource")
             
             res = Inputs.get_numbers(res)[0]
@@ -1686,6 +1854,24 @@ class Misc:
             print("couldn't get idle cap")
             return 0
 
+    @staticmethod
+    def get_idle_caps() -> List[int]:
+        """Get the available idle energy, magic and resource 3 at once.
+        
+        All three are read with a single OCR call, see Inputs.ocr_many().
+        Returns 0 for every resource that couldn't be read.
+        """
+        caps = []
+        results = Inputs.ocr_many([coords.OCR_ENERGY, coords.OCR_MAGIC, coords.OCR_R3],
+                                  sliced=True, glyphs=True)
+        for name, result in zip(["energy", "magic", "r3"], results):
+            try:
+                caps.append(Inputs.get_numbers(result.text)[0])
+            except IndexError:
+                print(f"couldn't get idle {name} cap")
+                caps.append(0)
+        return caps
+
     @staticmethod
     def set_input(value :int) -> None:
         """Sets a value in the input box.
@@ -1694,9 +1880,14 @@ class Misc:
         Keyword arguments
         value -- The value to be set
         """
+        text = str(int(value)) if isinstance(value, float) else str(value)
+        # The box keeps its value between menus, so don't type it again
+        if Navigation.input_box_value == text:
+            return
         Navigation.input_box()
-        Inputs.send_string(value)
+        Inputs.send_string(text)
         Misc.waste_click()
+        Navigation.input_box_value = text
     
     @staticmethod
     def waste_click() -> None:
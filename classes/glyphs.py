@@ -0,0 +1,227 @@
+"""Glyphs class reads text drawn in the game's pixel font without tesseract."""
+import json
+import os
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy
+
+
+class Glyphs:
+    """Reads single lines of text by looking up every glyph in a table.
+
+    The game draws numbers in a fixed pixel font, so the same character
+    always has the same pixels. An area is binarized, cut into glyphs at the
+    empty columns between them, and every glyph is looked up in a table
+    learned from labeled crops, see learn_glyphs.py. A read only succeeds
+    if every glyph matches the table exactly and every gap between them is
+    clearly a space or clearly not, otherwise None is returned and the
+    caller can fall back to tesseract.
+    """
+
+    # Pixels darker than this are ink
+    THRESHOLD = 128
+    table_file = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                              "glyph_table.json")
+    # (shape, packed bits) -> character, None for glyphs learned with
+    # different characters
+    table = {}
+    # Shapes of the glyphs in the table, for splitting glyphs that touch
+    shapes = set()
+    # Widest gap seen between glyphs of a word, and narrowest gap seen at a
+    # space. Gaps in between can't be told apart, see read()
+    letter_gap = 0
+    space_gap = None
+    loaded = False
+
+    @staticmethod
+    def clear() -> None:
+        """Forget every glyph, so the table can be learned from scratch."""
+        Glyphs.loaded = True
+        Glyphs.table = {}
+        Glyphs.shapes = set()
+        Glyphs.letter_gap = 0
+        Glyphs.space_gap = None
+
+    @staticmethod
+    def load() -> None:
+        """Load the table, if it has been saved before."""
+        Glyphs.clear()
+        try:
+            with open(Glyphs.table_file) as f:
+                saved = json.load(f)
+            for entry in saved["glyphs"]:
+                h, w = entry["shape"]
+                bits = numpy.unpackbits(numpy.frombuffer(bytes.fromhex(entry["bits"]), numpy.uint8))
+                glyph = bits[:h * w].reshape(h, w).astype(bool)
+                Glyphs.table[Glyphs.key(glyph)] = entry["char"]
+                Glyphs.shapes.add(glyph.shape)
+            Glyphs.letter_gap, Glyphs.space_gap = saved["gaps"]
+        except (OSError, ValueError, KeyError, TypeError):
+            Glyphs.clear()
+
+    @staticmethod
+    def save() -> None:
+        """Save the table for the next run."""
+        glyphs = [{"char": char, "shape": list(shape), "bits": bits.hex()}
+                  for (shape, bits), char in Glyphs.table.items()]
+        try:
+            with open(Glyphs.table_file, "w") as f:
+                json.dump({"glyphs": glyphs, "gaps": [Glyphs.letter_gap, Glyphs.space_gap]}, f)
+        except OSError:
+            print("Couldn't save the glyph table")
+
+    @staticmethod
+    def key(glyph :numpy.ndarray) -> Tuple[Tuple[int, int], bytes]:
+        """Return the table key of a glyph."""
+        return glyph.shape, numpy.packbits(glyph).tobytes()
+
+    @staticmethod
+    def add(glyph :numpy.ndarray, char :str) -> None:
+        """Add a glyph to the table.
+
+        A glyph that was already learned as another character can't be told
+        apart from it, so it is kept as unknown from then on.
+        """
+        key = Glyphs.key(glyph)
+        if key in Glyphs.table and Glyphs.table[key] != char:
+            char = None
+        Glyphs.table[key] = char
+        Glyphs.shapes.add(glyph.shape)
+
+    @staticmethod
+    def segment(area :numpy.ndarray) -> Tuple[List[numpy.ndarray], List[int]]:
+        """Cut a grayscale area into glyphs.
+
+        Returns the glyphs from left to right and the number of empty
+        columns between every two of them. Every glyph spans the rows of the
+        whole line, so glyphs like "." and "," keep their height above the
+        baseline.
+        """
+        ink = area < Glyphs.THRESHOLD
+        rows = numpy.flatnonzero(ink.any(axis=1))
+        if not rows.size:
+            return [], []
+        ink = ink[rows[0]:rows[-1] + 1]
+        columns = numpy.concatenate(([False], ink.any(axis=0), [False]))
+        edges = numpy.flatnonzero(columns[1:] != columns[:-1])
+        starts, stops = edges[::2].tolist(), edges[1::2].tolist()
+        glyphs = [ink[:, start:stop] for start, stop in zip(starts, stops)]
+        gaps = [start - stop for start, stop in zip(starts[1:], stops)]
+        return glyphs, gaps
+
+    @staticmethod
+    def lookup(glyph :numpy.ndarray) -> Optional[str]:
+        """Return the character of a glyph, or None if it isn't exactly in the table."""
+        return Glyphs.table.get(Glyphs.key(glyph))
+
+    @staticmethod
+    def splits(glyph :numpy.ndarray, limit :int =2) -> List[str]:
+        """Return up to limit ways to read glyphs that touch as known glyphs."""
+        h, width = glyph.shape
+        if width == 0:
+            return [""]
+        found = []
+        char = Glyphs.lookup(glyph)
+        if char is not None:
+            found.append(char)
+        for w in sorted({w for shape_h, w in Glyphs.shapes if shape_h == h and w < width}, reverse=True):
+            char = Glyphs.lookup(glyph[:, :w])
+            if char is None:
+                continue
+            rest = glyph[:, w:]
+            columns = numpy.flatnonzero(rest.any(axis=0))
+            rest = rest[:, columns[0]:] if columns.size else rest[:, :0]
+            for chars in Glyphs.splits(rest, limit - len(found)):
+                if char + chars not in found:
+                    found.append(char + chars)
+            if len(found) >= limit:
+                break
+        return found
+
+    @staticmethod
+    def split(glyph :numpy.ndarray) -> Optional[str]:
+        """Return the characters of glyphs that touch, if they're all known.
+
+        Glyphs without an empty column between them end up in one segment.
+        Known glyphs of the same height are tried from the left, widest
+        first. Only a segment that can be read one way is returned.
+        """
+        found = Glyphs.splits(glyph)
+        return found[0] if len(found) == 1 else None
+
+    @staticmethod
+    def read(area :numpy.ndarray) -> Optional[str]:
+        """Return the text in a grayscale area, or None if it can't be read.
+
+        The area must hold a single line of dark text on a light background.
+        Gaps up to letter_gap are inside a word, gaps from space_gap on are
+        spaces. A gap in between, or one wider than any seen so far when no
+        spaces were learned, isn't read at all.
+        """
+        if not Glyphs.loaded:
+            Glyphs.load()
+        if not Glyphs.table:
+            return None
+        glyphs, gaps = Glyphs.segment(area)
+        text = []
+        for i, glyph in enumerate(glyphs):
+            if i:
+                gap = gaps[i - 1]
+                if Glyphs.space_gap is not None and gap >= Glyphs.space_gap:
+                    text.append(" ")
+                elif gap > Glyphs.letter_gap:
+                    return None
+            char = Glyphs.lookup(glyph)
+            if char is None:
+                char = Glyphs.split(glyph)
+            if char is None:
+                return None
+            text.append(char)
+        return "".join(text) or None
+
+    @staticmethod
+    def learn(area :numpy.ndarray, text :str) -> bool:
+        """Add the glyphs in an area to the table, labeled with its text.
+
+        The gaps next to the spaces in the text are learned as well. Returns
+        False if the area doesn't split into as many glyphs as the text has
+        characters, spaces left out, or if its gaps contradict the ones
+        learned so far.
+        """
+        if not Glyphs.loaded:
+            Glyphs.load()
+        glyphs, gaps = Glyphs.segment(area)
+        words = text.split()
+        chars = "".join(words)
+        if len(glyphs) != len(chars):
+            return False
+        # Gap index before the first character of every word but the first
+        spaces = set()
+        i = 0
+        for word in words[:-1]:
+            i += len(word)
+            spaces.add(i - 1)
+        letter_gap, space_gap = Glyphs.letter_gap, Glyphs.space_gap
+        for i, gap in enumerate(gaps):
+            if i in spaces:
+                space_gap = gap if space_gap is None else min(space_gap, gap)
+            else:
+                letter_gap = max(letter_gap, gap)
+        if space_gap is not None and space_gap <= letter_gap:
+            return False
+        Glyphs.letter_gap, Glyphs.space_gap = letter_gap, space_gap
+        for glyph, char in zip(glyphs, chars):
+            Glyphs.add(glyph, char)
+        return True
+
+    @staticmethod
+    def characters() -> Dict[str, int]:
+        """Return how many variants of every character the table holds."""
+        if not Glyphs.loaded:
+            Glyphs.load()
+        counts = {}
+        for char in Glyphs.table.values():
+            if char is not None:
+                counts[char] = counts.get(char, 0) + 1
+        return counts
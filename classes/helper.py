@@ -1,43 +1,69 @@
 """Helper functions."""
 from classes.window     import Window
 from classes.inputs     import Inputs
+from classes.macro      import Macro
+from classes.navigation import Navigation
 from classes.features   import Inventory, MoneyPit, Adventure, Yggdrasil, GoldDiggers, Questing
 
 import coordinates as coords
+import usersettings as userset
 
 
 class Helper:
+    # Game settings the scripts rely on
+    requirements_macro = Macro("requirements", [
+        Macro.click(*coords.GAME_SETTINGS, gap=userset.MEDIUM_SLEEP),
+        Macro.click(*coords.TO_SCIENTIFIC),
+        Macro.click(*coords.CHECK_FOR_UPDATE_OFF),
+        Macro.click(*coords.FANCY_TITAN_HP_BAR_OFF),
+        Macro.click(*coords.DISABLE_HIGHSCORE),
+        Macro.click(*coords.SETTINGS_PAGE_2, gap=userset.MEDIUM_SLEEP),
+        Macro.click(*coords.SIMPLE_INVENTORY_SHORTCUT_ON, gap=userset.MEDIUM_SLEEP),
+    ])
+
     def init(printCoords :bool =False) -> None:
         """Initialize Window class variables.
         Helper.init() should go at the very top of any script, straight after imports.
         """
-        rects = Window.init()
-        for window_id, rect in rects.items():
-            if printCoords: print(f"Scanning window id: {window_id}")
-            w = rect[2] - rect[0]
-            h = rect[3] - rect[1]
-            Window.id = window_id
-            cds = Inputs.pixel_search(coords.TOP_LEFT_COLOR, 0, 0, w, h)
-            if cds:
-                Window.setPos(*cds)
-                break
+        cds = None
+        if Inputs.session is not None and Inputs.session.replaying:
+            # Use the window that was found when the session was recorded
+            Window.id, *cds = Inputs.session.window()
+            Window.setPos(*cds)
+        # The game window rarely moves between runs, so try where it was last time
+        elif Window.load_cache():
+            if printCoords: print(f"Checking cached window id: {Window.id}")
+            Inputs.invalidate_frame()
+            if Inputs.check_pixel_color(0, 0, coords.TOP_LEFT_COLOR):
+                cds = Window.x, Window.y
+        
         if cds is None:
-            raise RuntimeError("Game window not found. Maybe it's minimized or the game is not fully visible?")
+            rects = Window.init()
+            for window_id, rect in rects.items():
+                if printCoords: print(f"Scanning window id: {window_id}")
+                w = rect[2] - rect[0]
+                h = rect[3] - rect[1]
+                Window.id = window_id
+                Inputs.invalidate_frame()
+                cds = Inputs.pixel_search(coords.TOP_LEFT_COLOR, 0, 0, w, h)
+                if cds:
+                    Window.setPos(*cds)
+                    break
+            if cds is None:
+                raise RuntimeError("Game window not found. Maybe it's minimized or the game is not fully visible?")
+            Window.save_cache()
+        if Inputs.session is not None and not Inputs.session.replaying:
+            Inputs.session.add_window(Window.id, Window.x, Window.y)
         # Sometimes the very first click is ignored, this makes sure the first click is unimportant.
         Inputs.click(*coords.WASTE_CLICK)
+        Navigation.input_box_value = None
         
         if printCoords: print(f"Top left found at: {Window.x}, {Window.y}")
 
     def requirements() -> None:
         """Set everything to the proper requirements to run the script.
         It's strongly recommended to run this straight after init()."""
-        Inputs.click(*coords.GAME_SETTINGS)
-        Inputs.click(*coords.TO_SCIENTIFIC)
-        Inputs.click(*coords.CHECK_FOR_UPDATE_OFF)
-        Inputs.click(*coords.FANCY_TITAN_HP_BAR_OFF)
-        Inputs.click(*coords.DISABLE_HIGHSCORE)
-        Inputs.click(*coords.SETTINGS_PAGE_2)
-        Inputs.click(*coords.SIMPLE_INVENTORY_SHORTCUT_ON)
+        Helper.requirements_macro.run()
 
     def loop(idle_majors :bool =False) -> None:
         """Run infinite loop to prevent idling after task is complete.
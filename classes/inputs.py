@@ -1,61 +1,130 @@
 """Input class contains functions for mouse and keyboard input."""
-from ctypes import windll
-import win32api
-import win32con as wcon
-import win32gui
-import win32ui
+try:
+    from ctypes import windll
+    import win32api
+    import win32con as wcon
+    import win32gui
+except ImportError:
+    # Recorded sessions can still be replayed without pywin32
+    windll = win32api = wcon = win32gui = None
 
+import atexit
+import contextlib
+import ctypes
 import datetime
+import json
 import os
+import queue
 import re
+import threading
 import time
+import zlib
 
-from typing import Iterable, Optional, Tuple
+from collections import namedtuple
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple, Union
 
 from PIL import Image as image
 from PIL import ImageFilter
 import cv2
 import numpy
 
-import pytesseract
-
 import usersettings as userset
+from classes.glyphs import Glyphs
+from classes.ocr import OCR
+from classes.session import Session
+from classes.templates import Templates
 from classes.window import Window
 
+Frame = namedtuple("Frame", "image time")
+# Template match, x and y are the top left corner of the match
+Match = namedtuple("Match", "x y w h score")
+# Text read from one box by ocr_many() and tesseract's confidence in it
+OcrResult = namedtuple("OcrResult", "text confidence")
+
+class BitmapInfoHeader(ctypes.Structure):
+    """BITMAPINFOHEADER structure used to create the capture DIB section."""
+    _fields_ = [("biSize", ctypes.c_uint32),
+                ("biWidth", ctypes.c_int32),
+                ("biHeight", ctypes.c_int32),
+                ("biPlanes", ctypes.c_uint16),
+                ("biBitCount", ctypes.c_uint16),
+                ("biCompression", ctypes.c_uint32),
+                ("biSizeImage", ctypes.c_uint32),
+                ("biXPelsPerMeter", ctypes.c_int32),
+                ("biYPelsPerMeter", ctypes.c_int32),
+                ("biClrUsed", ctypes.c_uint32),
+                ("biClrImportant", ctypes.c_uint32)]
+
 class Inputs:
     """This class handles inputs."""
 
+    # Last captured frame, shared by every read until the next input or
+    # until it's older than userset.FRAME_CACHE_MAX_AGE.
+    frame = None
+    frame_gray = None
+    frame_bmp = None
+    frame_time = 0.0
+    # Time of the last click, key press or drag
+    last_input = 0.0
+    # Background capture thread, see start_capture()
+    grabber = None
+    # Thread sending queued inputs, see send_input()
+    dispatcher = None
+    # Threads running template matches, see match_many()
+    match_pool = None
+    # Threads running OCR reads, see ocr_bitmaps()
+    ocr_pool = None
+    # Last match of every keyed image search and its hits and misses,
+    # see image_search()
+    search_hints = {}
+    search_stats = {}
+    # Pixels searched around the last match before the whole area
+    HINT_MARGIN = 40
+    # Height of the empty band between areas read by ocr_many()
+    OCR_BAND = 32
+    # Session being recorded or replayed, see record_session()
+    session = None
+    # Measured delay per action class, see calibrate.py and delay()
+    timings = {}
+    timings_file = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                "timings.json")
+    
+    # GDI objects and buffers reused by every capture, see setup_capture()
+    capture_dc = None
+    capture_dib = None
+    capture_size = (0, 0)
+    capture_buffer = None
+    capture_gray = None
+    # Same as above for get_region(), keyed by the size of the region
+    region_captures = {}
+
     @staticmethod
-    def click(x :int, y :int, button :str ="left", fast :bool =False) -> None:
+    def click(x :int, y :int, button :str ="left", fast :bool =False) -> Future:
         """Click at pixel xy."""
+        if Inputs.log_input("click", x, y, button, fast):
+            return Inputs.completed()
         x += Window.x
         y += Window.y
         lParam = win32api.MAKELONG(x, y)
-        # MOUSEMOVE event is required for game to register clicks correctly
-        win32gui.PostMessage(Window.id, wcon.WM_MOUSEMOVE, 0, lParam)
-        while (win32api.GetKeyState(wcon.VK_CONTROL) < 0 or
-               win32api.GetKeyState(wcon.VK_SHIFT) < 0 or
-               win32api.GetKeyState(wcon.VK_MENU) < 0):
-            time.sleep(0.005)
         if button == "left":
-            win32gui.PostMessage(Window.id, wcon.WM_LBUTTONDOWN,
-                                 wcon.MK_LBUTTON, lParam)
-            win32gui.PostMessage(Window.id, wcon.WM_LBUTTONUP,
-                                 wcon.MK_LBUTTON, lParam)
+            down, up, flag = wcon.WM_LBUTTONDOWN, wcon.WM_LBUTTONUP, wcon.MK_LBUTTON
         else:
-            win32gui.PostMessage(Window.id, wcon.WM_RBUTTONDOWN,
-                                 wcon.MK_RBUTTON, lParam)
-            win32gui.PostMessage(Window.id, wcon.WM_RBUTTONUP,
-                                 wcon.MK_RBUTTON, lParam)
+            down, up, flag = wcon.WM_RBUTTONDOWN, wcon.WM_RBUTTONUP, wcon.MK_RBUTTON
+        # MOUSEMOVE event is required for game to register clicks correctly
+        messages = [(wcon.WM_MOUSEMOVE, 0, lParam, 0),
+                    (down, flag, lParam, 0),
+                    (up, flag, lParam, 0)]
         # Sleep lower than 0.1 might cause issues when clicking in succession
         if fast:
-            time.sleep(userset.FAST_SLEEP)
-        else:
-            time.sleep(userset.MEDIUM_SLEEP)
+            return Inputs.send_input(messages, userset.FAST_SLEEP)
+        return Inputs.send_input(messages, userset.MEDIUM_SLEEP)
 
     @staticmethod
-    def click_drag(x :int, y :int, x2 :int, y2 :int) -> None:
+    def click_drag(x :int, y :int, x2 :int, y2 :int) -> Future:
         """Click at pixel xy."""
+        if Inputs.log_input("click_drag", x, y, x2, y2):
+            return Inputs.completed()
         x += Window.x
         y += Window.y
         x2 += Window.x
@@ -63,132 +132,633 @@ class Inputs:
         lParam = win32api.MAKELONG(x, y)
         lParam2 = win32api.MAKELONG(x2, y2)
         # MOUSEMOVE event is required for game to register clicks correctly
-        win32gui.PostMessage(Window.id, wcon.WM_MOUSEMOVE, 0, lParam)
-        while (win32api.GetKeyState(wcon.VK_CONTROL) < 0 or
-               win32api.GetKeyState(wcon.VK_SHIFT) < 0 or
-               win32api.GetKeyState(wcon.VK_MENU) < 0):
-            time.sleep(0.005)
-        win32gui.PostMessage(Window.id, wcon.WM_LBUTTONDOWN,
-                             wcon.MK_LBUTTON, lParam)
-        time.sleep(userset.LONG_SLEEP * 2)
-        win32gui.PostMessage(Window.id, wcon.WM_MOUSEMOVE, 0, lParam2)
-        time.sleep(userset.SHORT_SLEEP)
-        win32gui.PostMessage(Window.id, wcon.WM_LBUTTONUP,
-                             wcon.MK_LBUTTON, lParam2)
-        time.sleep(userset.MEDIUM_SLEEP)
+        messages = [(wcon.WM_MOUSEMOVE, 0, lParam, 0),
+                    (wcon.WM_LBUTTONDOWN, wcon.MK_LBUTTON, lParam, userset.LONG_SLEEP * 2),
+                    (wcon.WM_MOUSEMOVE, 0, lParam2, userset.SHORT_SLEEP),
+                    (wcon.WM_LBUTTONUP, wcon.MK_LBUTTON, lParam2, 0)]
+        return Inputs.send_input(messages, userset.MEDIUM_SLEEP)
 
     @staticmethod
-    def ctrl_click(x :int, y :int) -> None:
+    def ctrl_click(x :int, y :int) -> Future:
         """Clicks at pixel x, y while simulating the CTRL button to be down."""
+        if Inputs.log_input("ctrl_click", x, y):
+            return Inputs.completed()
         x += Window.x
         y += Window.y
         lParam = win32api.MAKELONG(x, y)
-        while (win32api.GetKeyState(wcon.VK_CONTROL) < 0 or
-               win32api.GetKeyState(wcon.VK_SHIFT) < 0 or
-               win32api.GetKeyState(wcon.VK_MENU) < 0):
-            time.sleep(0.005)
-
-        win32gui.PostMessage(Window.id, wcon.WM_KEYDOWN, wcon.VK_CONTROL, 0)
-        win32gui.PostMessage(Window.id, wcon.WM_LBUTTONDOWN,
-                             wcon.MK_LBUTTON, lParam)
-        win32gui.PostMessage(Window.id, wcon.WM_LBUTTONUP,
-                             wcon.MK_LBUTTON, lParam)
-        win32gui.PostMessage(Window.id, wcon.WM_KEYUP, wcon.VK_CONTROL, 0)
-        time.sleep(userset.MEDIUM_SLEEP)
+        messages = [(wcon.WM_KEYDOWN, wcon.VK_CONTROL, 0, 0),
+                    (wcon.WM_LBUTTONDOWN, wcon.MK_LBUTTON, lParam, 0),
+                    (wcon.WM_LBUTTONUP, wcon.MK_LBUTTON, lParam, 0),
+                    (wcon.WM_KEYUP, wcon.VK_CONTROL, 0, 0)]
+        return Inputs.send_input(messages, userset.MEDIUM_SLEEP)
 
     @staticmethod
-    def send_arrow_press(left :bool) -> None:
+    def send_arrow_press(left :bool) -> Future:
         """Sends either a left or right arrow key press"""
+        if Inputs.log_input("send_arrow_press", left):
+            return Inputs.completed()
         if left: key = wcon.VK_LEFT
         else   : key = wcon.VK_RIGHT
         
-        win32gui.PostMessage(Window.id, wcon.WM_KEYDOWN, key, 0)
-        time.sleep(0.05)
-        win32gui.PostMessage(Window.id, wcon.WM_KEYUP, key, 0)
-        time.sleep(0.05)
+        messages = [(wcon.WM_KEYDOWN, key, 0, 0.05),
+                    (wcon.WM_KEYUP, key, 0, 0)]
+        return Inputs.send_input(messages, 0.05, modifiers=False)
     
     @staticmethod
-    def send_string(string :str) -> None:
+    def send_string(string :str) -> Future:
         """Send one or multiple characters to the Window."""
         # Ensure it's a string by converting it to a string
         if isinstance(string, float):
             string = int(string)
-        for c in str(string):
-            # Make sure no key modifier is pressed
-            while (win32api.GetKeyState(wcon.VK_CONTROL) < 0 or
-                   win32api.GetKeyState(wcon.VK_SHIFT)   < 0 or
-                   win32api.GetKeyState(wcon.VK_MENU)    < 0):
-                time.sleep(0.005)
-            
-            vkc = win32api.VkKeyScan(c)  # Get virtual key code for character c
-            # Only one keyup or keydown event needs to be sent
-            win32gui.PostMessage(Window.id, wcon.WM_KEYDOWN, vkc, 0)
+        if Inputs.log_input("send_string", str(string)):
+            return Inputs.completed()
+        # Only one keyup or keydown event needs to be sent, using the
+        # virtual key code for each character
+        messages = [(wcon.WM_KEYDOWN, win32api.VkKeyScan(c), 0, 0) for c in str(string)]
+        return Inputs.send_input(messages, 0)
+    
+    @staticmethod
+    def send_input(messages :List[Tuple[int, int, int, float]], spacing :float,
+                   modifiers :bool =True) -> Future:
+        """Post messages to the Window and wait spacing seconds afterwards.
+        
+        With userset.ASYNC_INPUT the messages are queued for the dispatcher
+        thread instead and this returns right away. Captures wait for the
+        queue to be sent first, see flush(). Returns a Future that's done
+        once the input was sent and spacing has passed.
+        
+        Keyword arguments
+        messages  -- List of (message, wParam, lParam, sleep) tuples, sleep
+                     is how long to wait after posting that message.
+        spacing   -- Minimum time before the next input is sent.
+        modifiers -- Wait until ctrl, shift and alt aren't held down.
+        """
+        if getattr(userset, "ASYNC_INPUT", False):
+            if Inputs.dispatcher is None:
+                Inputs.dispatcher = InputDispatcher()
+                Inputs.dispatcher.start()
+            return Inputs.dispatcher.put(messages, spacing, modifiers)
+        
+        Inputs.post_messages(messages, modifiers)
+        Inputs.input_sent()
+        time.sleep(spacing)
+        return Inputs.completed()
+    
+    @staticmethod
+    def post_messages(messages :List[Tuple[int, int, int, float]], modifiers :bool) -> None:
+        """Post messages to the Window, see send_input()."""
+        # Make sure no key modifier is pressed
+        while modifiers and (win32api.GetKeyState(wcon.VK_CONTROL) < 0 or
+                             win32api.GetKeyState(wcon.VK_SHIFT)   < 0 or
+                             win32api.GetKeyState(wcon.VK_MENU)    < 0):
+            time.sleep(0.005)
+        for message, wParam, lParam, sleep in messages:
+            win32gui.PostMessage(Window.id, message, wParam, lParam)
+            if sleep:
+                time.sleep(sleep)
+    
+    @staticmethod
+    def completed() -> Future:
+        """Return a Future for an input that has already been sent."""
+        future = Future()
+        future.set_result(None)
+        return future
+    
+    @staticmethod
+    def flush() -> None:
+        """Wait until every queued input has been sent, see send_input()."""
+        if Inputs.dispatcher is not None:
+            Inputs.dispatcher.queue.join()
+    
+    @staticmethod
+    def stop_dispatcher() -> None:
+        """Send the queued inputs and stop the dispatcher thread."""
+        dispatcher = Inputs.dispatcher
+        if dispatcher is None:
+            return
+        Inputs.dispatcher = None
+        dispatcher.queue.put(None)
+        dispatcher.join()
+    
+    @staticmethod
+    def delay(action :str, default :float) -> float:
+        """Return how long to wait after a fast click for the action to show.
+        
+        Keyword arguments
+        action  -- The action class, one of "menu", "input", "ability" or
+                   "inventory".
+        default -- The delay to use if the action hasn't been calibrated.
+        """
+        return Inputs.timings.get(action, default)
+    
+    @staticmethod
+    def load_timings() -> None:
+        """Load the timing profile written by calibrate.py, if there is one."""
+        try:
+            with open(Inputs.timings_file) as f:
+                timings = json.load(f)
+        except (OSError, ValueError):
+            return
+        if not isinstance(timings, dict):
+            return
+        Inputs.timings = {}
+        for action, delay in timings.items():
+            # Values that aren't numbers keep their default delay
+            try:
+                Inputs.timings[action] = float(delay)
+            except (TypeError, ValueError):
+                print(f"Ignoring the timing for {action} in {Inputs.timings_file}: {delay!r}")
+    
+    @staticmethod
+    def save_timings(timings :dict) -> None:
+        """Save a timing profile and start using it."""
+        Inputs.timings = dict(timings)
+        with open(Inputs.timings_file, "w") as f:
+            json.dump(Inputs.timings, f, indent=4, sort_keys=True)
+    
+    @staticmethod
+    def log_input(name :str, *args) -> bool:
+        """Pass an input to the session that's being recorded or replayed.
+        
+        Returns True if the session is being replayed, in which case the
+        input must not be sent to the Window.
+        
+        Keyword arguments
+        name -- The name of the method sending the input.
+        args -- The arguments it was called with, before adding Window.x/y.
+        """
+        if Inputs.session is None:
+            return False
+        if Inputs.session.replaying:
+            Inputs.session.advance(name, args)
+            Inputs.input_sent()
+            return True
+        Inputs.session.add_input(name, args)
+        return False
+    
+    @staticmethod
+    def record_session(path :str) -> Session:
+        """Record every captured frame and every input to the file at path.
+        
+        Background capture is stopped and regions are sliced out of full
+        frames while recording, so that every capture ends up in the file.
+        """
+        Inputs.end_session()
+        Inputs.stop_capture()
+        Inputs.invalidate_frame()
+        Inputs.session = Session(path)
+        return Inputs.session
+    
+    @staticmethod
+    def replay_session(path :str) -> Session:
+        """Serve captures from a recorded session instead of the Window.
+        
+        Inputs aren't sent while replaying, each one skips ahead to the
+        frames that followed it in the recording instead. This works
+        without pywin32, so scripts can be profiled offline.
+        """
+        Inputs.end_session()
+        Inputs.stop_capture()
+        Inputs.invalidate_frame()
+        Inputs.session = Session(path, replaying=True)
+        return Inputs.session
+    
+    @staticmethod
+    def end_session() -> None:
+        """Stop recording or replaying, if a session is active."""
+        session = Inputs.session
+        if session is None:
+            return
+        Inputs.session = None
+        Inputs.invalidate_frame()
+        session.close()
+    
+    @staticmethod
+    def create_dib(w :int, h :int) -> Tuple[int, int, numpy.ndarray]:
+        """Create a memory DC with a w x h DIB section selected into it.
+        
+        Returns the DC, the DIB section and a BGRX numpy view of its pixels,
+        anything drawn into the DC shows up in the array without copying.
+        """
+        gdi32 = windll.gdi32
+        gdi32.CreateCompatibleDC.restype = ctypes.c_void_p
+        gdi32.CreateCompatibleDC.argtypes = [ctypes.c_void_p]
+        gdi32.CreateDIBSection.restype = ctypes.c_void_p
+        gdi32.CreateDIBSection.argtypes = [ctypes.c_void_p, ctypes.c_void_p, ctypes.c_uint,
+                                           ctypes.POINTER(ctypes.c_void_p), ctypes.c_void_p,
+                                           ctypes.c_uint32]
+        gdi32.SelectObject.restype = ctypes.c_void_p
+        gdi32.SelectObject.argtypes = [ctypes.c_void_p, ctypes.c_void_p]
+        gdi32.DeleteObject.argtypes = [ctypes.c_void_p]
+        gdi32.DeleteDC.argtypes = [ctypes.c_void_p]
+        gdi32.BitBlt.argtypes = [ctypes.c_void_p, ctypes.c_int, ctypes.c_int, ctypes.c_int,
+                                 ctypes.c_int, ctypes.c_void_p, ctypes.c_int, ctypes.c_int,
+                                 ctypes.c_uint32]
+        windll.user32.PrintWindow.argtypes = [ctypes.c_void_p, ctypes.c_void_p, ctypes.c_uint]
+        
+        header = BitmapInfoHeader()
+        header.biSize = ctypes.sizeof(BitmapInfoHeader)
+        header.biWidth = w
+        header.biHeight = -h  # Negative height gives a top-down bitmap
+        header.biPlanes = 1
+        header.biBitCount = 32
+        header.biCompression = 0  # BI_RGB
+        
+        dc = gdi32.CreateCompatibleDC(None)
+        if not dc:
+            raise RuntimeError("Couldn't create a DC for capturing the window")
+        bits = ctypes.c_void_p()
+        dib = gdi32.CreateDIBSection(dc, ctypes.byref(header), 0, ctypes.byref(bits), None, 0)
+        if not dib:
+            gdi32.DeleteDC(dc)
+            raise RuntimeError("Couldn't create a bitmap for capturing the window")
+        gdi32.SelectObject(dc, dib)
+        
+        buffer = (ctypes.c_uint8 * (w * h * 4)).from_address(bits.value)
+        return dc, dib, numpy.ctypeslib.as_array(buffer).reshape(h, w, 4)
+    
+    @staticmethod
+    def setup_capture(w :int, h :int) -> None:
+        """Create the memory DC and DIB section that frames are captured into.
+        
+        The DIB section's pixels live in a buffer that is exposed as a numpy
+        array, so PrintWindow writes straight into the array every capture.
+        Objects from a previous setup are released first.
+        """
+        Inputs.release_capture()
+        dc, dib, buffer = Inputs.create_dib(w, h)
+        Inputs.capture_dc = dc
+        Inputs.capture_dib = dib
+        Inputs.capture_size = (w, h)
+        Inputs.capture_buffer = buffer
+        Inputs.capture_gray = numpy.empty((h, w), dtype=numpy.uint8)
+    
+    @staticmethod
+    def release_capture() -> None:
+        """Delete the GDI objects used for capturing, if there are any."""
+        Inputs.invalidate_frame()
+        Inputs.capture_buffer = None
+        Inputs.capture_gray = None
+        Inputs.capture_size = (0, 0)
+        if Inputs.capture_dib:
+            windll.gdi32.DeleteObject(Inputs.capture_dib)
+            Inputs.capture_dib = None
+        if Inputs.capture_dc:
+            windll.gdi32.DeleteDC(Inputs.capture_dc)
+            Inputs.capture_dc = None
+        for dc, dib, _ in Inputs.region_captures.values():
+            windll.gdi32.DeleteObject(dib)
+            windll.gdi32.DeleteDC(dc)
+        Inputs.region_captures = {}
+    
+    @staticmethod
+    def get_frame(gray :bool =False) -> numpy.ndarray:
+        """Capture the Window and return it as a numpy array.
+        
+        The array is a view of the capture buffer in BGRX order (height x
+        width x 4), no copies are made. The buffer is overwritten by the next
+        capture, so copy the array if you need to keep it around.
+        
+        Keyword arguments
+        gray -- Return a grayscale version instead. It's written into a
+                preallocated buffer as well.
+        """
+        Inputs.flush()
+        if Inputs.session is not None and Inputs.session.replaying:
+            Inputs.invalidate_frame()
+            frame = Inputs.session.next_frame()
+            return Inputs.to_gray(frame) if gray else frame
+        
+        left, top, right, bot = win32gui.GetWindowRect(Window.id)
+        size = (right - left, bot - top)
+        if size != Inputs.capture_size:
+            Inputs.setup_capture(*size)
+        
+        Inputs.invalidate_frame()
+        windll.user32.PrintWindow(Window.id, Inputs.capture_dc, 0)
+        windll.gdi32.GdiFlush()
+        if Inputs.session is not None:
+            Inputs.session.add_frame(Inputs.capture_buffer)
+        if gray:
+            return Inputs.to_gray(Inputs.capture_buffer)
+        return Inputs.capture_buffer
+    
+    @staticmethod
+    def frame_to_bitmap(frame :numpy.ndarray) -> image:
+        """Convert a BGRX frame into a Pillow Image that owns its pixels."""
+        h, w = frame.shape[:2]
+        return image.frombuffer('RGB', (w, h), numpy.ascontiguousarray(frame),
+                                'raw', 'BGRX', 0, 1)
     
     @staticmethod
     def get_bitmap() -> image:
         """Get and return a bitmap of the Window."""
-        left, top, right, bot = win32gui.GetWindowRect(Window.id)
-        w = right - left
-        h = bot - top
-        hwnd_dc = win32gui.GetWindowDC(Window.id)
-        mfc_dc = win32ui.CreateDCFromHandle(hwnd_dc)
-        save_dc = mfc_dc.CreateCompatibleDC()
-        save_bitmap = win32ui.CreateBitmap()
-        save_bitmap.CreateCompatibleBitmap(mfc_dc, w, h)
-        save_dc.SelectObject(save_bitmap)
-        windll.user32.PrintWindow(Window.id, save_dc.GetSafeHdc(), 0)
-        bmpinfo = save_bitmap.GetInfo()
-        bmpstr = save_bitmap.GetBitmapBits(True)
-
-        # This creates an Image object from Pillow
-        bmp = image.frombuffer('RGB',
-                               (bmpinfo['bmWidth'],
-                                bmpinfo['bmHeight']),
-                               bmpstr, 'raw', 'BGRX', 0, 1)
-
-        win32gui.DeleteObject(save_bitmap.GetHandle())
-        save_dc.DeleteDC()
-        mfc_dc.DeleteDC()
-        win32gui.ReleaseDC(Window.id, hwnd_dc)
+        bmp = Inputs.frame_to_bitmap(Inputs.get_frame())
         # bmp.save("asdf.png")
         return bmp
+    
+    @staticmethod
+    def get_cached_frame(gray :bool =False) -> numpy.ndarray:
+        """Get a frame of the Window, reusing the last one if it's still valid.
+        
+        The cached frame is dropped on any input (click, key press, drag)
+        and expires after userset.FRAME_CACHE_MAX_AGE seconds, so every read
+        in between shares a single capture. If background capture is running
+        the newest frame taken after the last input is used instead, without
+        capturing on this thread.
+        
+        Keyword arguments
+        gray -- Return the grayscale version of the frame.
+        """
+        Inputs.flush()
+        latest = Inputs.wait_for_frame(newer_than=Inputs.last_input)
+        if latest is not None:
+            if Inputs.frame is None or latest.time > Inputs.frame_time:
+                Inputs.invalidate_frame()
+                Inputs.frame, Inputs.frame_time = latest
+        elif not Inputs.frame_valid():
+            now = time.time()
+            Inputs.frame = Inputs.get_frame()
+            Inputs.frame_time = now
+        if not gray:
+            return Inputs.frame
+        if Inputs.frame_gray is None:
+            Inputs.frame_gray = Inputs.to_gray(Inputs.frame)
+        return Inputs.frame_gray
+    
+    @staticmethod
+    def to_gray(frame :numpy.ndarray) -> numpy.ndarray:
+        """Convert a BGRX frame to grayscale in the preallocated gray buffer."""
+        if Inputs.capture_gray is None or Inputs.capture_gray.shape != frame.shape[:2]:
+            Inputs.capture_gray = numpy.empty(frame.shape[:2], dtype=numpy.uint8)
+        return cv2.cvtColor(frame, cv2.COLOR_BGRA2GRAY, dst=Inputs.capture_gray)
+    
+    @staticmethod
+    def get_cached_bitmap() -> image:
+        """Get a bitmap of the cached frame, see get_cached_frame()."""
+        frame = Inputs.get_cached_frame()
+        if Inputs.frame_bmp is None:
+            Inputs.frame_bmp = Inputs.frame_to_bitmap(frame)
+        return Inputs.frame_bmp
+
+    @staticmethod
+    def frame_valid() -> bool:
+        """Return whether the cached frame can still be used."""
+        return (Inputs.frame is not None and
+                time.time() - Inputs.frame_time <= getattr(userset, "FRAME_CACHE_MAX_AGE", 0))
+
+    @staticmethod
+    def get_region(x_start :int, y_start :int, x_end :int, y_end :int) -> numpy.ndarray:
+        """Capture only the supplied area of the Window.
+        
+        Coordinates are relative to the window like the ones passed to
+        get_cropped_bitmap(). Only the area is copied from the window DC, so
+        it has to be visible on screen just like with get_pixel_color(). If
+        the cached frame is still valid, the area is sliced out of it instead.
+        
+        Returns a BGRX numpy array that is reused by the next capture of an
+        area with the same size, copy it if you need to keep it around.
+        """
+        Inputs.flush()
+        if Inputs.session is not None:
+            # Sessions only hold full frames
+            frame = Inputs.get_cached_frame()
+            return frame[y_start + 8:y_end + 8, x_start + 8:x_end + 8]
+        if Inputs.frame_valid():
+            return Inputs.frame[y_start + 8:y_end + 8, x_start + 8:x_end + 8]
+        
+        size = (x_end - x_start, y_end - y_start)
+        if size not in Inputs.region_captures:
+            Inputs.region_captures[size] = Inputs.create_dib(*size)
+        dc, _, buffer = Inputs.region_captures[size]
+        
+        hwnd_dc = win32gui.GetWindowDC(Window.id)
+        try:
+            windll.gdi32.BitBlt(dc, 0, 0, size[0], size[1], hwnd_dc,
+                                x_start + 8, y_start + 8, wcon.SRCCOPY)
+        finally:
+            win32gui.ReleaseDC(Window.id, hwnd_dc)
+        windll.gdi32.GdiFlush()
+        return buffer
+
+    @staticmethod
+    def invalidate_frame() -> None:
+        """Drop the cached frame, the next read will capture a new one."""
+        Inputs.frame = None
+        Inputs.frame_gray = None
+        Inputs.frame_bmp = None
+
+    @staticmethod
+    def input_sent() -> None:
+        """Note that input was sent, frames from before it are outdated."""
+        Inputs.last_input = time.time()
+        Inputs.invalidate_frame()
+
+    @staticmethod
+    def region_hash(x_start :int, y_start :int, x_end :int, y_end :int) -> int:
+        """Return a fingerprint of the area, see wait_settle().
+        
+        Only every other pixel is hashed and the lowest bits of every channel
+        are dropped, so tiny color shifts don't change the fingerprint.
+        """
+        region = Inputs.get_region(x_start, y_start, x_end, y_end)[::2, ::2, :3] >> 3
+        return zlib.crc32(numpy.ascontiguousarray(region).tobytes())
+
+    @staticmethod
+    def wait_settle(x_start :int, y_start :int, x_end :int, y_end :int, timeout :float,
+                    before :int =None, expected :int =None) -> bool:
+        """Wait for the area to finish changing after an input.
+        
+        Returns True as soon as the area matches expected, or once it differs
+        from before and has looked the same for userset.SETTLE_TIME seconds.
+        Returns False after timeout seconds, pass the sleep this replaces so
+        it's never slower than sleeping.
+        
+        Keyword arguments
+        before   -- Fingerprint of the area from before the input, taken with
+                    region_hash(). Without it the area counts as settled as
+                    soon as it stops changing, which can be before the game
+                    even reacted to the input.
+        expected -- Fingerprint the area is known to have once it's done.
+        """
+        end = time.time() + timeout
+        last = None
+        since = 0.0
+        while True:
+            # Every check needs a new capture
+            Inputs.invalidate_frame()
+            now = time.time()
+            fingerprint = Inputs.region_hash(x_start, y_start, x_end, y_end)
+            if fingerprint == expected:
+                return True
+            if fingerprint != last:
+                last, since = fingerprint, now
+            elif fingerprint != before and now - since >= getattr(userset, "SETTLE_TIME", 0.05):
+                return True
+            if now >= end:
+                return False
+            time.sleep(max(0, min(0.01, end - time.time())))
+
+    @staticmethod
+    def start_capture(rate :float =None, size :int =4) -> bool:
+        """Start capturing the Window on a background thread.
+        
+        Frames are kept in a ring buffer of preallocated arrays. While it runs,
+        every read uses the newest frame instead of capturing itself. Returns
+        False if background capture was already running, is disabled or a
+        session is being recorded or replayed.
+        
+        Keyword arguments
+        rate -- Frames per second to capture, defaults to userset.CAPTURE_RATE.
+                A rate of 0 disables background capture.
+        size -- The amount of frames kept in the ring buffer. A frame is
+                overwritten after this many newer ones have been captured.
+        """
+        if rate is None:
+            rate = getattr(userset, "CAPTURE_RATE", 0)
+        if Inputs.grabber is not None or Inputs.session is not None or rate <= 0:
+            return False
+        Inputs.grabber = FrameGrabber(rate, size)
+        Inputs.grabber.start()
+        return True
+
+    @staticmethod
+    def stop_capture() -> None:
+        """Stop the background capture thread, if it's running."""
+        grabber = Inputs.grabber
+        if grabber is None:
+            return
+        Inputs.grabber = None
+        grabber.stop()
+        grabber.join()
+        Inputs.invalidate_frame()
+
+    @staticmethod
+    @contextlib.contextmanager
+    def capturing(rate :float =None) -> Iterable[None]:
+        """Run background capture for the duration of a with block.
+        
+        Does nothing if background capture is disabled or already running,
+        in which case it's left running afterwards.
+        """
+        started = Inputs.start_capture(rate)
+        try:
+            yield
+        finally:
+            if started:
+                Inputs.stop_capture()
+
+    @staticmethod
+    def latest_frame() -> Optional[Frame]:
+        """Return the newest frame from background capture as (image, time).
+        
+        Returns None if background capture isn't running or has no frame yet.
+        """
+        if Inputs.grabber is None:
+            return None
+        return Inputs.grabber.latest()
+
+    @staticmethod
+    def wait_for_frame(newer_than :float =0, timeout :float =1) -> Optional[Frame]:
+        """Wait for a background capture taken after newer_than.
+        
+        Returns the frame as (image, time), or None if background capture
+        isn't running or no frame arrived within timeout seconds.
+        """
+        if Inputs.grabber is None:
+            return None
+        return Inputs.grabber.wait(newer_than, timeout)
 
     @staticmethod
     def get_cropped_bitmap(x_start :int =0, y_start :int =0, x_end :int =960, y_end :int =600) -> image:
-        return Inputs.get_bitmap().crop(
-            (x_start + 8, y_start + 8, x_end + 8, y_end + 8))
+        """Get a bitmap of the supplied area of the Window, see get_region()."""
+        return Inputs.frame_to_bitmap(Inputs.get_region(x_start, y_start, x_end, y_end))
     
     @staticmethod
-    def pixel_search(color :str, x_start :int, y_start :int, x_end :int, y_end :int) -> Optional[Tuple[int, int]]:
+    def color_mask(frame :numpy.ndarray, color :str, tolerance :int =0) -> numpy.ndarray:
+        """Return a mask of the pixels in a BGRX frame that match the color.
+        
+        Matching pixels are 255, everything else is 0.
+        
+        Keyword arguments
+        color     -- The color to look for in hex.
+        tolerance -- The largest difference allowed per channel. (default 0)
+        """
+        r, g, b = Inputs.hex_to_rgb(color)
+        lower = (max(b - tolerance, 0), max(g - tolerance, 0), max(r - tolerance, 0), 0)
+        upper = (min(b + tolerance, 255), min(g + tolerance, 255), min(r + tolerance, 255), 255)
+        return cv2.inRange(frame, lower, upper)
+    
+    @staticmethod
+    def pixel_search(
+        color :str,
+        x_start :int,
+        y_start :int,
+        x_end :int,
+        y_end :int,
+        tolerance :int =0,
+        all_matches :bool =False
+    ) -> Optional[Tuple[int, int]]:
         """Find the first pixel with the supplied color within area.
         
         Function searches per row, left to right. Returns the coordinates of
         first match or None, if nothing is found.
         
         Color must be supplied in hex.
+        
+        Keyword arguments
+        tolerance   -- The largest difference allowed per color channel.
+                       (default 0)
+        all_matches -- Return a list with the coordinates of every matching
+                       pixel, in the same order as above, instead.
         """
-        bmp = Inputs.get_bitmap()
-        width, height = bmp.size
-        for y in range(y_start, y_end):
-            for x in range(x_start, x_end):
-                if y > height or x > width:
-                    continue
-                t = bmp.getpixel((x, y))
-                if Inputs.rgb_to_hex(t) == color:
-                    return x - 8, y - 8
+        frame = Inputs.get_cached_frame()[y_start:y_end, x_start:x_end]
+        if frame.size == 0:
+            # Empty or off-window area
+            return [] if all_matches else None
+        
+        mask = Inputs.color_mask(frame, color, tolerance)
+        if all_matches:
+            ys, xs = numpy.nonzero(mask)
+            return [(x + x_start - 8, y + y_start - 8) for x, y in zip(xs.tolist(), ys.tolist())]
+        
+        index = int(mask.argmax())
+        if not mask.flat[index]:
+            return None
+        
+        y, x = divmod(index, mask.shape[1])
+        return x + x_start - 8, y + y_start - 8
+
+    @staticmethod
+    def get_search_area(x_start :int, y_start :int, x_end :int, y_end :int,
+                        bmp :image =None) -> numpy.ndarray:
+        """Return the area as a grayscale numpy array for template matching.
+        
+        Without a bitmap the area is a view into the cached grayscale frame,
+        so nothing is copied.
+        """
+        if bmp is None:
+            # Bitmaps are created with a 8px border
+            frame = Inputs.get_cached_frame(gray=True)
+            return frame[y_start + 8:y_end + 8, x_start + 8:x_end + 8]
         
-        return None
+        search_area = bmp.crop((x_start + 8, y_start + 8,
+                                x_end + 8, y_end + 8))
+        search_area = numpy.asarray(search_area)
+        return cv2.cvtColor(search_area, cv2.COLOR_RGB2GRAY)
 
     @staticmethod
     def image_search(x_start :int, y_start :int, x_end :int, y_end :int,
-                     img :str, threshold :int, bmp :image =None) -> Optional[Tuple[int, int]]:
+                     img :str, threshold :int, bmp :image =None,
+                     pyramid :int =0, key :str =None) -> Optional[Tuple[int, int]]:
         """Search the screen for the supplied picture.
         
         Returns a tuple with x,y-coordinates, or None if result is below
         the threshold.
         
         Keyword arguments:
-        image     -- Filename or path to file that you search for.
+        image     -- Name of an image in images/ or path to the file that you
+                     search for, see Templates.get().
         threshold -- The level of fuzziness to use - a perfect match will be
                      close to 1, but probably never 1. In my testing use a
                      value between 0.7-0.95 depending on how strict you wish
@@ -198,20 +768,109 @@ class Inputs:
                      from the same page. This is to avoid to needlessly get the
                      same bitmap multiple times. If a bitmap is not passed, the
                      function will get the bitmap itself. (default None)
+        pyramid   -- Search downscaled images first, see match_template().
+                     (default 0)
+        key       -- Remember where the image was found under this key, and
+                     search a small window around that spot first next time.
+                     The whole area is only searched if the image isn't
+                     there anymore, and the spot is forgotten if it isn't
+                     found at all, see search_report(). (default None)
         """
-        if not bmp: bmp = Inputs.get_bitmap()
-        # Bitmaps are created with a 8px border
-        search_area = bmp.crop((x_start + 8, y_start + 8,
-                                x_end + 8, y_end + 8))
-        search_area = numpy.asarray(search_area)
-        search_area = cv2.cvtColor(search_area, cv2.COLOR_RGB2GRAY)
-        template = cv2.imread(img, 0)
+        search_area = Inputs.get_search_area(x_start, y_start, x_end, y_end, bmp)
+        hint = Inputs.search_hints.get(key) if key is not None else None
+        if hint is not None:
+            hits, misses = Inputs.search_stats.get(key, (0, 0))
+            x, y, w, h = hint
+            margin = Inputs.HINT_MARGIN
+            x0, y0 = max(0, x - x_start - margin), max(0, y - y_start - margin)
+            # Negative ends would wrap around and slice most of the area
+            x1, y1 = max(0, x - x_start + w + margin), max(0, y - y_start + h + margin)
+            window = search_area[y0:y1, x0:x1]
+            if window.shape[0] >= h and window.shape[1] >= w:
+                match = Inputs.match_template(window, img, threshold)
+                if match is not None:
+                    Inputs.search_stats[key] = (hits + 1, misses)
+                    Inputs.search_hints[key] = (x_start + x0 + match.x, y_start + y0 + match.y, w, h)
+                    return x0 + match.x, y0 + match.y
+            Inputs.search_stats[key] = (hits, misses + 1)
+        
+        match = Inputs.match_template(search_area, img, threshold, pyramid)
+        if match is None:
+            # Don't check a spot the image has left on every later search
+            Inputs.search_hints.pop(key, None)
+            return None
+        
+        if key is not None:
+            Inputs.search_hints[key] = (x_start + match.x, y_start + match.y, match.w, match.h)
+        return match.x, match.y
+
+    @staticmethod
+    def search_report() -> str:
+        """Return a table with how often keyed image searches hit their hint."""
+        lines = [f"{'Search':<30}{'Hits':>6}{'Misses':>8}{'Hit rate':>10}"]
+        for key, (hits, misses) in sorted(Inputs.search_stats.items()):
+            lines.append(f"{key:<30}{hits:>6}{misses:>8}{hits / (hits + misses):>10.0%}")
+        return "\n".join(lines)
+
+    @staticmethod
+    def match_template(search_area :numpy.ndarray, img :str, threshold :float,
+                       pyramid :int =0) -> Optional[Match]:
+        """Return the best match of a template in a grayscale area.
+        
+        Returns None if the best match is below the threshold.
+        
+        Keyword arguments
+        pyramid -- Halve the area and template this many times and match
+                   those first. Only the best few candidates are then matched
+                   at full size, in a small window around each. This is much
+                   faster on large areas, benchmark.py compares the results
+                   with a full search. If none of the candidates match, the
+                   whole area is searched at full size as well, so misses
+                   cost a little more than without pyramid. Templates that
+                   would end up smaller than 4 pixels are always searched at
+                   full size.
+        """
+        template = Templates.get(img)
+        h, w = template.shape
+        scale = 2 ** pyramid
+        area_h, area_w = search_area.shape
+        if pyramid > 0 and min(w, h) // scale >= 4 and min(area_w, area_h) >= scale * max(w, h):
+            small_template = Inputs.pyramid_down(template, pyramid)
+            res = cv2.matchTemplate(Inputs.pyramid_down(search_area, pyramid), small_template,
+                                    cv2.TM_CCOEFF_NORMED)
+            # Downscaling blurs the match, so let weaker candidates through
+            candidates = Inputs.get_matches(res, *small_template.shape[::-1],
+                                            threshold - 0.4, max_hits=5)
+            best = None
+            pad = scale * 2
+            for candidate in candidates:
+                x0 = max(0, candidate.x * scale - pad)
+                y0 = max(0, candidate.y * scale - pad)
+                x1 = min(area_w, candidate.x * scale + pad + w)
+                y1 = min(area_h, candidate.y * scale + pad + h)
+                res = cv2.matchTemplate(search_area[y0:y1, x0:x1], template, cv2.TM_CCOEFF_NORMED)
+                _, max_val, _, (x, y) = cv2.minMaxLoc(res)
+                if best is None or max_val > best.score:
+                    best = Match(x0 + x, y0 + y, w, h, max_val)
+            if best is not None and best.score >= threshold:
+                return best
+            # The downscaled pass can lose the match, only a full search
+            # can tell that the template isn't there
+        
         res = cv2.matchTemplate(search_area, template, cv2.TM_CCOEFF_NORMED)
         _, max_val, _, max_loc = cv2.minMaxLoc(res)
         if max_val < threshold:
             return None
-        
-        return max_loc
+        return Match(*max_loc, w, h, max_val)
+
+    @staticmethod
+    def pyramid_down(img :numpy.ndarray, levels :int) -> numpy.ndarray:
+        """Halve a grayscale image levels times, blurring it before every step."""
+        for _ in range(levels):
+            h, w = img.shape
+            img = cv2.resize(cv2.GaussianBlur(img, (5, 5), 0), (w // 2, h // 2),
+                             interpolation=cv2.INTER_AREA)
+        return img
 
     @staticmethod
     def find_all(
@@ -221,14 +880,17 @@ class Inputs:
         y_end :int,
         img :str,
         threshold: float,
-        bmp :image=None) -> tuple:
+        bmp :image=None,
+        max_hits :int =None) -> tuple:
         """Search the screen for the supplied picture.
         
-        Returns a list with x, y-coordinates with all matches, or None if result is below
-        the threshold.
+        Returns a list with the x, y-coordinates of the center of every
+        match, best first. Overlapping matches of the same item are merged
+        into the best one.
         
         Keyword arguments:
-        image     -- Filename or path to file that you search for.
+        image     -- Name of an image in images/ or path to the file that you
+                     search for, see Templates.get().
         threshold -- The level of fuzziness to use - a perfect match will be
                      close to 1, but probably never 1. In my testing use a
                      value between 0.7-0.95 depending on how strict you wish
@@ -238,21 +900,89 @@ class Inputs:
                      from the same page. This is to avoid to needlessly get the
                      same bitmap multiple times. If a bitmap is not passed, the
                      function will get the bitmap itself. (default None)
+        max_hits  -- Return at most this many matches. (default None)
         """
-        if not bmp: bmp = Inputs.get_bitmap()
-        # Bitmaps are created with a 8px border
-        search_area = bmp.crop((x_start + 8, y_start + 8,
-                                x_end + 8, y_end + 8))
-        search_area = numpy.asarray(search_area)
-        search_area = cv2.cvtColor(search_area, cv2.COLOR_RGB2GRAY)
-        template = cv2.imread(img, 0)
+        search_area = Inputs.get_search_area(x_start, y_start, x_end, y_end, bmp)
+        template = Templates.get(img)
         w, h = template.shape[::-1]
         res = cv2.matchTemplate(search_area, template, cv2.TM_CCOEFF_NORMED)
-        locs = numpy.where(res >= threshold)
-        lst = []
-        for loc in zip(*locs[::-1]):
-            lst.append((loc[0] + w // 2, loc[1] + h // 2))
-        return lst
+        return [(m.x + w // 2, m.y + h // 2) for m in Inputs.get_matches(res, w, h, threshold, max_hits)]
+
+    @staticmethod
+    def get_matches(res :numpy.ndarray, w :int, h :int, threshold :float,
+                    max_hits :int =None) -> List[Match]:
+        """Return the matches in a matchTemplate result, best first.
+        
+        Uses non-maximum suppression: after taking the best remaining
+        match, every location within a template sized window around it is
+        dropped, so each item on screen is only found once.
+        
+        Keyword arguments
+        w, h      -- The size of the template.
+        threshold -- The lowest score to count as a match.
+        max_hits  -- Stop after this many matches. (default None)
+        """
+        if not res.size or res.max() < threshold:
+            return []
+        res = res.copy()
+        matches = []
+        while max_hits is None or len(matches) < max_hits:
+            _, score, _, (x, y) = cv2.minMaxLoc(res)
+            if score < threshold:
+                break
+            matches.append(Match(x, y, w, h, score))
+            res[max(0, y - h + 1):y + h, max(0, x - w + 1):x + w] = -1
+        return matches
+
+    @staticmethod
+    def match_many(
+        frame :Union[numpy.ndarray, image, None],
+        templates :Iterable[str],
+        threshold :float,
+        roi :Tuple[int, int, int, int] =None,
+        max_hits :int =None) -> Dict[str, List[Match]]:
+        """Search one frame for several templates at once.
+        
+        The frame is converted to grayscale once and every template is
+        matched on a thread pool, OpenCV releases the GIL while matching.
+        Returns a dict with a list of matches for every template, best first,
+        see get_matches(). Match coordinates are relative to the roi, like
+        image_search().
+        
+        Keyword arguments
+        frame     -- A BGRX or grayscale frame, a bitmap, or None to use the
+                     cached frame.
+        templates -- Names of images in images/ or paths, see Templates.get().
+        threshold -- The lowest score to count as a match, see image_search().
+        roi       -- The area to search as (x_start, y_start, x_end, y_end),
+                     with the same coordinates as image_search(). Searches
+                     the whole frame if omitted.
+        max_hits  -- Return at most this many matches per template.
+        """
+        if frame is None:
+            gray = Inputs.get_cached_frame(gray=True)
+        elif isinstance(frame, numpy.ndarray):
+            gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGRA2GRAY)
+        else:
+            gray = numpy.asarray(frame.convert('L'))
+        if roi is not None:
+            # Bitmaps are created with a 8px border
+            x_start, y_start, x_end, y_end = roi
+            gray = gray[y_start + 8:y_end + 8, x_start + 8:x_end + 8]
+        
+        def match(name :str) -> List[Match]:
+            template = Templates.get(name)
+            h, w = template.shape
+            res = cv2.matchTemplate(gray, template, cv2.TM_CCOEFF_NORMED)
+            return Inputs.get_matches(res, w, h, threshold, max_hits)
+        
+        templates = list(templates)
+        # Load templates on this thread, the registry isn't thread safe
+        for name in templates:
+            Templates.get(name)
+        if Inputs.match_pool is None:
+            Inputs.match_pool = ThreadPoolExecutor(max_workers=os.cpu_count())
+        return dict(zip(templates, Inputs.match_pool.map(match, templates)))
 
     @staticmethod
     def rgb_equal(a :Tuple[int, int, int], b :Tuple[int, int, int]) -> bool:
@@ -272,7 +1002,8 @@ class Inputs:
          cropb :bool =False,
          filter :bool =True,
          binf :int =0,
-         sliced :bool =False
+         sliced :bool =False,
+         glyphs :bool =False
      ) -> str:
         """Perform an OCR of the supplied area, returns a string of the result.
         
@@ -288,12 +1019,25 @@ class Inputs:
         binf   -- Threshold value for binarizing filter. Zero means no filtering.
         sliced -- Whether the image has ben sliced so there's very little blank
                   space. Gets better readings from small values for some reason.
+        glyphs -- Read the area with the learned glyph table first, see
+                  Glyphs. Tesseract is only used if the table can't read
+                  every glyph and space exactly.
+                  Only for single lines of text in the game's pixel font.
+        
+        Results are cached by the content of the area, reading the same
+        pixels again returns the same text without running tesseract. See
+        OCR and userset.OCR_CACHE_SIZE.
         """
         x_start += Window.x
         x_end   += Window.x
         y_start += Window.y
         y_end   += Window.y
 
+        if glyphs and not debug and (bmp is None or cropb):
+            s = Glyphs.read(Inputs.get_glyph_area(x_start, y_start, x_end, y_end, bmp))
+            if s is not None:
+                return s
+        
         if bmp is None:
             bmp = Inputs.get_cropped_bitmap(x_start, y_start, x_end, y_end)
         
@@ -301,37 +1045,182 @@ class Inputs:
             # Bitmaps are created with a 8px border
             bmp = bmp.crop((x_start + 8, y_start + 8, x_end + 8, y_end + 8))
         
+        config = '--psm 6' if sliced else '--psm 4'
+        # Filtering is deterministic, so the unfiltered image is a good key
+        key = OCR.key(bmp, binf, filter, config)
+        if not debug:
+            s = OCR.get(key)
+            if s is not None:
+                return s
+        
+        bmp = Inputs.prepare_ocr(bmp, filter, binf, debug)
+        s = OCR.image_to_string(bmp, config)
+        OCR.put(key, s)
+        return s
+
+    @staticmethod
+    def get_glyph_area(x_start :int, y_start :int, x_end :int, y_end :int,
+                       bmp :image =None) -> numpy.ndarray:
+        """Return the grayscale area for a glyph read, see Glyphs.read().
+        
+        Without a bitmap only the area is captured, see get_region().
+        """
+        if bmp is not None:
+            return Inputs.get_search_area(x_start, y_start, x_end, y_end, bmp)
+        return cv2.cvtColor(Inputs.get_region(x_start, y_start, x_end, y_end), cv2.COLOR_BGRA2GRAY)
+
+    @staticmethod
+    def prepare_ocr(bmp :image, filter :bool =True, binf :int =0, debug :bool =False) -> image:
+        """Filter a bitmap for better OCR, see ocr() for the arguments."""
         if binf > 0: # Binarizing Filter
             fn = lambda x : 255 if x > binf else 0
             bmp = bmp.convert('L') # To Monochrome
             bmp = bmp.point(fn, mode='1')
             if debug: bmp.save("debug_ocr_whiten.png")
         
-        if filter: # Resizing and sharpening
+        if filter and bmp.getbbox() is not None: # Resizing and sharpening
             *_, right, lower = bmp.getbbox()
             bmp = bmp.resize((right * 4, lower * 4), image.BICUBIC)  # Resize image
             bmp = bmp.filter(ImageFilter.SHARPEN)
             if debug: bmp.save("debug_ocr_filter.png")
-            
-        if sliced: s = pytesseract.image_to_string(bmp, config='--psm 6')
-        else:      s = pytesseract.image_to_string(bmp, config='--psm 4')
+        return bmp
+
+    @staticmethod
+    def ocr_bitmaps(bmps :Iterable[image], **kwargs) -> List[str]:
+        """OCR several bitmaps at the same time, returns the text of each.
         
-        return s
+        Every bitmap is read whole, like ocr() with bmp. Takes the same
+        keyword arguments as ocr().
+        """
+        if Inputs.ocr_pool is None:
+            Inputs.ocr_pool = ThreadPoolExecutor(max_workers=os.cpu_count())
+        return list(Inputs.ocr_pool.map(lambda bmp: Inputs.ocr(0, 0, 0, 0, bmp=bmp, **kwargs), bmps))
+
+    @staticmethod
+    def ocr_many(
+         boxes :Iterable[Tuple[int, int, int, int]],
+         bmp :image =None,
+         filter :bool =True,
+         binf :int =0,
+         sliced :bool =False,
+         glyphs :bool =False
+     ) -> List[OcrResult]:
+        """OCR several areas of the same frame with a single tesseract call.
+        
+        The filtered areas are stacked below each other, with an empty band
+        between them, and read as one image. The words are then sorted back
+        into their areas by their position. Returns an OcrResult for every
+        box, in the same order. The confidence is tesseract's average word
+        confidence in that area, from 0 to 100. Areas without any words get
+        0, and areas read with the glyph table get 100.
+        
+        Keyword arguments
+        boxes  -- OCRBoxes to read, in the same coordinates as ocr().
+        bmp    -- A bitmap from the get_bitmap() function to crop the boxes
+                  from. Otherwise they're all cropped from a single capture,
+                  see get_cached_frame().
+        filter -- Whether to filter the areas for better OCR, see ocr().
+        binf   -- Threshold value for binarizing filter, see ocr().
+        sliced -- Whether the areas have been sliced so there's very little
+                  blank space, see ocr().
+        glyphs -- Read every area with the learned glyph table first, only
+                  the areas it can't read go to tesseract, see ocr().
+        """
+        boxes = list(boxes)
+        results = [None] * len(boxes)
+        crops = []
+        # Every box comes from one capture, so all values are from the same moment
+        frame = Inputs.get_cached_frame() if bmp is None else None
+        for i, (x_start, y_start, x_end, y_end) in enumerate(boxes):
+            x_start += Window.x
+            x_end   += Window.x
+            y_start += Window.y
+            y_end   += Window.y
+            if frame is not None:
+                # Frames are captured with a 8px border
+                region = frame[y_start + 8:y_end + 8, x_start + 8:x_end + 8]
+            if glyphs:
+                if frame is not None:
+                    area = cv2.cvtColor(region, cv2.COLOR_BGRA2GRAY)
+                else:
+                    area = Inputs.get_search_area(x_start, y_start, x_end, y_end, bmp)
+                s = Glyphs.read(area)
+                if s is not None:
+                    results[i] = OcrResult(s, 100.0)
+                    continue
+            if frame is not None:
+                crop = Inputs.frame_to_bitmap(region)
+            else:
+                # Bitmaps are created with a 8px border
+                crop = bmp.crop((x_start + 8, y_start + 8, x_end + 8, y_end + 8))
+            crops.append((i, Inputs.prepare_ocr(crop, filter, binf)))
+        if not crops:
+            return results
+        
+        band = Inputs.OCR_BAND
+        width = max(crop.width for _, crop in crops) + 2 * band
+        height = sum(crop.height for _, crop in crops) + band * (len(crops) + 1)
+        sheet = image.new("L", (width, height), 255)
+        areas = []
+        y = band
+        for i, crop in crops:
+            sheet.paste(crop, (band, y))
+            areas.append((i, y - band // 2, y + crop.height + band // 2))
+            y += crop.height + band
+        
+        lines = {i: {} for i, _ in crops}
+        confidences = {i: [] for i, _ in crops}
+        config = '--psm 6' if sliced else '--psm 4'
+        for word in OCR.image_to_data(sheet, config):
+            if float(word["conf"]) < 0 or not word["text"].strip():
+                continue
+            center = int(word["top"]) + int(word["height"]) // 2
+            for i, top, bottom in areas:
+                if top <= center < bottom:
+                    line = tuple(int(word[k]) for k in ("block_num", "par_num", "line_num"))
+                    lines[i].setdefault(line, []).append(word["text"])
+                    confidences[i].append(float(word["conf"]))
+                    break
+        for i, _ in crops:
+            text = "\n".join(" ".join(words) for _, words in sorted(lines[i].items()))
+            confidence = sum(confidences[i]) / len(confidences[i]) if confidences[i] else 0.0
+            results[i] = OcrResult(text, confidence)
+        return results
 
     @staticmethod
     def get_pixel_color(x :int, y :int, debug :bool =False) -> str:
         """Get the color of selected pixel in HEX."""
-        dc = win32gui.GetWindowDC(Window.id)
-        rgba = win32gui.GetPixel(dc, x + 8 + Window.x, y + 8 + Window.y)
-        win32gui.ReleaseDC(Window.id, dc)
-        r = rgba & 0xff
-        g = rgba >> 8 & 0xff
-        b = rgba >> 16 & 0xff
+        Inputs.flush()
+        if (getattr(userset, "FRAME_CACHE_MAX_AGE", 0) > 0 or Inputs.grabber is not None or
+                Inputs.session is not None):
+            frame = Inputs.get_cached_frame()
+            b, g, r = frame[y + 8 + Window.y, x + 8 + Window.x, :3].tolist()
+        else:
+            dc = win32gui.GetWindowDC(Window.id)
+            rgba = win32gui.GetPixel(dc, x + 8 + Window.x, y + 8 + Window.y)
+            win32gui.ReleaseDC(Window.id, dc)
+            r = rgba & 0xff
+            g = rgba >> 8 & 0xff
+            b = rgba >> 16 & 0xff
         
         if debug: print(Inputs.rgb_to_hex((r, g, b)))
         
         return Inputs.rgb_to_hex((r, g, b))
 
+    @staticmethod
+    def get_pixel_colors(points :Iterable[Tuple[int, int]]) -> List[str]:
+        """Get the colors of several pixels in HEX from a single capture.
+        
+        Keyword arguments
+        points -- Iterable of x, y-coordinates, Pixel and ColorPixel tuples
+                  work as well. Colors are returned in the same order.
+        """
+        points = numpy.array([p[:2] for p in points], dtype=int).reshape(-1, 2)
+        frame = Inputs.get_cached_frame()
+        bgr = frame[points[:, 1] + 8 + Window.y, points[:, 0] + 8 + Window.x].astype(int)
+        values = bgr[:, 2] << 16 | bgr[:, 1] << 8 | bgr[:, 0]
+        return ['%06X' % v for v in values.tolist()]
+
     @staticmethod
     def check_pixel_color(x :int, y :int, checks :Iterable[str], debug :bool =False) -> bool:
         """Check if coordinate matches with one or more colors."""
@@ -387,12 +1276,12 @@ class Inputs:
     @staticmethod
     def ocr_number(x_1 :int, y_1 :int, x_2 :int, y_2 :int) -> int:
         """Remove all non-digits."""
-        return int(Inputs.remove_letters(Inputs.ocr(x_1, y_1, x_2, y_2)))
+        return int(Inputs.remove_letters(Inputs.ocr(x_1, y_1, x_2, y_2, glyphs=True)))
 
     @staticmethod
     def ocr_notation(x_1 :int, y_1 :int, x_2 :int, y_2 :int) -> int:
         """Convert scientific notation from string to int."""
-        return int(float(Inputs.ocr(x_1, y_1, x_2, y_2)))
+        return int(float(Inputs.ocr(x_1, y_1, x_2, y_2, glyphs=True)))
 
     @staticmethod
     def save_screenshot() -> None:
@@ -402,3 +1291,128 @@ class Inputs:
         if not os.path.exists("screenshots"):
             os.mkdir("screenshots")
         bmp.save('screenshots/' + datetime.datetime.now().strftime('%d-%m-%y-%H-%M-%S') + '.png')
+
+class FrameGrabber(threading.Thread):
+    """Captures the Window at a fixed rate into a ring buffer of frames."""
+
+    def __init__(self, rate :float, size :int) -> None:
+        super().__init__(daemon=True)
+        self.interval = 1 / rate
+        self.frames = []
+        self.times = [0.0] * size
+        self.size = size
+        self.index = -1
+        self.running = True
+        self.condition = threading.Condition()
+
+    def run(self) -> None:
+        """Capture frames until stop() is called."""
+        dc = dib = None
+        frame_size = (0, 0)
+        try:
+            while self.running:
+                start = time.time()
+                left, top, right, bot = win32gui.GetWindowRect(Window.id)
+                if (right - left, bot - top) != frame_size:
+                    if dib:
+                        windll.gdi32.DeleteObject(dib)
+                        windll.gdi32.DeleteDC(dc)
+                        dc = dib = None
+                    frame_size = (right - left, bot - top)
+                    dc, dib, buffer = Inputs.create_dib(*frame_size)
+                    with self.condition:
+                        # Readers may still hold the old arrays, so make new ones
+                        self.frames = [numpy.empty_like(buffer) for _ in range(self.size)]
+                        self.index = -1
+                
+                windll.user32.PrintWindow(Window.id, dc, 0)
+                windll.gdi32.GdiFlush()
+                index = (self.index + 1) % self.size
+                numpy.copyto(self.frames[index], buffer)
+                with self.condition:
+                    self.index = index
+                    self.times[index] = start
+                    self.condition.notify_all()
+                
+                time.sleep(max(0, self.interval - (time.time() - start)))
+        finally:
+            self.running = False
+            with self.condition:
+                self.condition.notify_all()
+            if dib:
+                windll.gdi32.DeleteObject(dib)
+                windll.gdi32.DeleteDC(dc)
+
+    def stop(self) -> None:
+        """Ask the thread to stop after the current capture."""
+        self.running = False
+
+    def latest(self) -> Optional[Frame]:
+        """Return the newest frame, or None if nothing has been captured."""
+        with self.condition:
+            if self.index < 0:
+                return None
+            return Frame(self.frames[self.index], self.times[self.index])
+
+    def wait(self, newer_than :float, timeout :float) -> Optional[Frame]:
+        """Wait until a frame captured after newer_than is available."""
+        end = time.time() + timeout
+        with self.condition:
+            while self.index < 0 or self.times[self.index] <= newer_than:
+                remaining = end - time.time()
+                if not self.running or remaining <= 0:
+                    return None
+                self.condition.wait(remaining)
+            return Frame(self.frames[self.index], self.times[self.index])
+
+class InputDispatcher(threading.Thread):
+    """Sends queued inputs to the Window, see Inputs.send_input()."""
+
+    def __init__(self) -> None:
+        super().__init__(daemon=True)
+        self.queue = queue.Queue()
+
+    def put(self, messages :List[Tuple[int, int, int, float]], spacing :float,
+            modifiers :bool) -> Future:
+        """Queue an input and return a Future for when it has been sent."""
+        future = Future()
+        self.queue.put((messages, spacing, modifiers, future))
+        return future
+
+    def run(self) -> None:
+        """Send queued inputs until None is queued."""
+        mouse_messages = {wcon.WM_MOUSEMOVE, wcon.WM_LBUTTONDOWN, wcon.WM_LBUTTONUP,
+                          wcon.WM_RBUTTONDOWN, wcon.WM_RBUTTONUP}
+        # Last cursor position sent while the queue hasn't run empty
+        cursor = None
+        while True:
+            item = self.queue.get()
+            if item is None:
+                self.queue.task_done()
+                return
+            messages, spacing, modifiers, future = item
+            try:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                # Moving the cursor where the last input left it is redundant
+                if messages and messages[0][0] == wcon.WM_MOUSEMOVE and messages[0][2] == cursor:
+                    messages = messages[1:]
+                Inputs.post_messages(messages, modifiers)
+                for message, _, lParam, _ in messages:
+                    if message in mouse_messages:
+                        cursor = lParam
+                Inputs.input_sent()
+                time.sleep(spacing)
+                future.set_result(None)
+            except Exception as e:
+                future.set_exception(e)
+            finally:
+                self.queue.task_done()
+                if self.queue.empty():
+                    cursor = None
+
+Inputs.load_timings()
+atexit.register(Inputs.stop_dispatcher)
+atexit.register(Inputs.stop_capture)
+atexit.register(Inputs.release_capture)
+atexit.register(Inputs.end_session)
@@ -0,0 +1,147 @@
+"""Macro class replays fixed sequences of clicks and key presses."""
+import time
+
+from collections import namedtuple
+from typing import Callable, Iterable, List, Tuple, Union
+
+from classes.inputs import Inputs, wcon, win32api
+from classes.window import Window
+
+import usersettings as userset
+
+Step = namedtuple("Step", "kind args gap")
+
+
+class Macro:
+    """A fixed sequence of clicks and key presses, described once as data.
+
+    Clicks are compiled into window messages with absolute lParams for the
+    current Window position, and compiled again whenever the window moves.
+    Running a macro sends every step as one input through
+    Inputs.send_input(), waiting only each step's gap instead of the full
+    sleep of a separate click. Afterwards the end state can be checked
+    against a list of ColorPixels or functions.
+    """
+
+    # Runs of every macro by name, see report()
+    stats = {}
+
+    def __init__(self, name :str, steps :Iterable[Step],
+                 checks :Iterable[Union[Tuple, Callable[[], bool]]] =()) -> None:
+        """Describe a macro.
+
+        Keyword arguments
+        name   -- Name used in report().
+        steps  -- Steps created with Macro.click() and Macro.keys().
+        checks -- ColorPixels that must match once the macro is done, or
+                  functions that must return True.
+        """
+        self.name = name
+        self.steps = list(steps)
+        self.checks = list(checks)
+        self.origin = None
+        self.compiled = []
+
+    @staticmethod
+    def click(x :int, y :int, button :str ="left", gap :float =None) -> Step:
+        """Click at pixel xy, then wait gap seconds (default FAST_SLEEP)."""
+        return Step("click", (x, y, button), userset.FAST_SLEEP if gap is None else gap)
+
+    @staticmethod
+    def keys(text :str, gap :float =None) -> Step:
+        """Type text, then wait gap seconds (default FAST_SLEEP).
+
+        Text can contain str.format() fields, they're filled in with the
+        keyword arguments passed to run().
+        """
+        return Step("keys", str(text), userset.FAST_SLEEP if gap is None else gap)
+
+    def compile(self) -> None:
+        """Turn the clicks into messages for the current Window position."""
+        self.compiled = []
+        for step in self.steps:
+            if step.kind != "click":
+                self.compiled.append(None)
+                continue
+            x, y, button = step.args
+            lParam = win32api.MAKELONG(x + Window.x, y + Window.y)
+            if button == "left":
+                down, up, flag = wcon.WM_LBUTTONDOWN, wcon.WM_LBUTTONUP, wcon.MK_LBUTTON
+            else:
+                down, up, flag = wcon.WM_RBUTTONDOWN, wcon.WM_RBUTTONUP, wcon.MK_RBUTTON
+            # MOUSEMOVE event is required for game to register clicks correctly
+            self.compiled.append([(wcon.WM_MOUSEMOVE, 0, lParam, 0),
+                                  (down, flag, lParam, 0),
+                                  (up, flag, lParam, step.gap)])
+        self.origin = (Window.x, Window.y)
+
+    def messages(self, **fields) -> List[Tuple[int, int, int, float]]:
+        """Return the messages for the whole macro, see compile()."""
+        if self.origin != (Window.x, Window.y):
+            self.compile()
+        messages = []
+        for step, compiled in zip(self.steps, self.compiled):
+            if compiled is not None:
+                messages.extend(compiled)
+                continue
+            text = step.args.format(**fields)
+            messages.extend((wcon.WM_KEYDOWN, win32api.VkKeyScan(c), 0, 0) for c in text)
+            if messages:
+                message, wParam, lParam, _ = messages[-1]
+                messages[-1] = (message, wParam, lParam, step.gap)
+        return messages
+
+    def replay_slowly(self, **fields) -> None:
+        """Send every step through the regular Inputs methods and their sleeps."""
+        for step in self.steps:
+            if step.kind == "click":
+                Inputs.click(*step.args)
+            else:
+                Inputs.send_string(step.args.format(**fields))
+
+    def check(self) -> bool:
+        """Return whether the end state matches every check."""
+        for check in self.checks:
+            if callable(check):
+                if not check():
+                    return False
+            elif not Inputs.check_pixel_color(*check):
+                return False
+        return True
+
+    def run(self, **fields) -> bool:
+        """Run the macro and return whether the end state checks passed.
+
+        If a check fails, the macro is run once more with the regular sleeps
+        between steps. Recorded or replayed sessions always use the regular
+        Inputs methods, so every step shows up in the session.
+
+        Keyword arguments
+        fields -- Values for the format fields in Macro.keys() steps.
+        """
+        start = time.time()
+        if Inputs.session is not None:
+            self.replay_slowly(**fields)
+        else:
+            messages = self.messages(**fields)
+            *_, gap = messages[-1]
+            messages[-1] = messages[-1][:3] + (0,)
+            Inputs.send_input(messages, gap)
+        ok = self.check()
+        if not ok:
+            self.replay_slowly(**fields)
+            ok = self.check()
+
+        runs, total, slowest, failures = Macro.stats.get(self.name, (0, 0.0, 0.0, 0))
+        elapsed = time.time() - start
+        Macro.stats[self.name] = (runs + 1, total + elapsed, max(slowest, elapsed),
+                                  failures + (not ok))
+        return ok
+
+    @staticmethod
+    def report() -> str:
+        """Return a table with how long every macro took to run."""
+        lines = [f"{'Macro':<20}{'Runs':>6}{'Average':>10}{'Slowest':>10}{'Failed':>8}"]
+        for name, (runs, total, slowest, failures) in sorted(Macro.stats.items()):
+            lines.append(f"{name:<20}{runs:>6}{total / runs:>9.3f}s{slowest:>9.3f}s{failures:>8}")
+        return "\n".join(lines)
@@ -1,6 +1,7 @@
 """Navigation class handles navigation through the menus."""
 import time
 from classes.inputs import Inputs
+from classes.window import Window
 import coordinates as coords
 import usersettings as userset
 
@@ -11,6 +12,25 @@ class Navigation:
     menus = coords.MENU_ITEMS
     # equipment = coords.EQUIPMENT_SLOTS # deprecated?
     current_menu = ''
+    # Last value entered with Misc.set_input(), None if the box might hold anything else
+    input_box_value = None
+    
+    @staticmethod
+    def click_settle(x :int, y :int, sleep :float, area :coords.OCRBox =coords.MENU_AREA) -> None:
+        """Click at pixel xy and wait until the area stops changing.
+        
+        Waits at most as long as a normal click followed by sleep, or as long
+        as calibrate.py measured for menus.
+        
+        Keyword arguments
+        area -- The area that changes when the click is done, relative to
+                the game like the click.
+        """
+        area = Window.gameCoords(*area)
+        before = Inputs.region_hash(*area)
+        Inputs.click(x, y, fast=True)
+        timeout = Inputs.delay("menu", userset.MEDIUM_SLEEP - userset.FAST_SLEEP + sleep)
+        Inputs.wait_settle(*area, timeout, before=before)
     
     @staticmethod
     def menu(target :str) -> None:
@@ -18,23 +38,22 @@ class Navigation:
         target = target.lower()
         if Navigation.current_menu == target:
             return
-        Inputs.click(*Navigation.menus[target])
-        time.sleep(userset.LONG_SLEEP)
+        Navigation.click_settle(*Navigation.menus[target], userset.LONG_SLEEP)
         Navigation.current_menu = target
     
     @staticmethod
     def input_box() -> None:
         """Click input box."""
-        Inputs.click(*coords.NUMBER_INPUT_BOX)
-        time.sleep(userset.SHORT_SLEEP)
+        Navigation.input_box_value = None
+        Inputs.click(*coords.NUMBER_INPUT_BOX, fast=True)
+        time.sleep(Inputs.delay("input", userset.MEDIUM_SLEEP - userset.FAST_SLEEP + userset.SHORT_SLEEP))
     
     @staticmethod
     def rebirth() -> None:
         """Click rebirth menu."""
         if Navigation.current_menu == 'rebirth':
             return
-        Inputs.click(*coords.REBIRTH)
-        time.sleep(userset.SHORT_SLEEP)
+        Navigation.click_settle(*coords.REBIRTH, userset.SHORT_SLEEP)
         Navigation.current_menu = 'rebirth'
     
     @staticmethod
@@ -42,21 +61,18 @@ class Navigation:
         if Navigation.current_menu == 'challenges':
             return
         Navigation.rebirth()
-        Inputs.click(*coords.CHALLENGE_BUTTON)
-        time.sleep(userset.SHORT_SLEEP)
+        Navigation.click_settle(*coords.CHALLENGE_BUTTON, userset.SHORT_SLEEP)
         Navigation.current_menu == 'challenges'
     
     @staticmethod
     def challenge_quit() -> None:
         Navigation.challenges()
-        Inputs.click(*coords.CHALLENGE_QUIT)
-        time.sleep(userset.SHORT_SLEEP)
+        Navigation.click_settle(*coords.CHALLENGE_QUIT, userset.SHORT_SLEEP)
 
     @staticmethod
     def confirm() -> None:
         """Click yes in confirm window."""
-        Inputs.click(*coords.CONFIRM)
-        time.sleep(userset.SHORT_SLEEP)
+        Navigation.click_settle(*coords.CONFIRM, userset.SHORT_SLEEP)
     
     @staticmethod
     def ngu_magic() -> None:
@@ -64,8 +80,7 @@ class Navigation:
         if Navigation.current_menu == 'ngu_magic':
             return
         Navigation.menu('ngu')
-        Inputs.click(*coords.NGU_MAGIC)
-        time.sleep(userset.SHORT_SLEEP)
+        Navigation.click_settle(*coords.NGU_MAGIC, userset.SHORT_SLEEP)
         Navigation.current_menu = 'ngu_magic'
     
     @staticmethod
@@ -73,8 +88,7 @@ class Navigation:
         """Navigate to EXP Menu."""
         if Navigation.current_menu == 'exp':
             return
-        Inputs.click(*coords.XP_MENU)
-        time.sleep(userset.SHORT_SLEEP)
+        Navigation.click_settle(*coords.XP_MENU, userset.SHORT_SLEEP)
         Navigation.current_menu = 'exp'
     
     @staticmethod
@@ -83,8 +97,7 @@ class Navigation:
         if Navigation.current_menu == 'exp_magic':
             return
         Navigation.exp()
-        Inputs.click(*coords.MAGIC_MENU)
-        time.sleep(userset.SHORT_SLEEP)
+        Navigation.click_settle(*coords.MAGIC_MENU, userset.SHORT_SLEEP)
         Navigation.current_menu = 'exp_magic'
     
     @staticmethod
@@ -93,8 +106,7 @@ class Navigation:
         if Navigation.current_menu == "exp_adventure":
             return
         Navigation.exp()
-        Inputs.click(*coords.ADVENTURE_MENU)
-        time.sleep(userset.SHORT_SLEEP)
+        Navigation.click_settle(*coords.ADVENTURE_MENU, userset.SHORT_SLEEP)
         Navigation.current_menu = "exp_adventure"
     
     @staticmethod
@@ -103,8 +115,7 @@ class Navigation:
         if Navigation.current_menu == "exp_rich":
             return
         Navigation.exp()
-        Inputs.click(*coords.RICH_MENU)
-        time.sleep(userset.SHORT_SLEEP)
+        Navigation.click_settle(*coords.RICH_MENU, userset.SHORT_SLEEP)
         Navigation.current_menu = "exp_rich"
     
     @staticmethod
@@ -113,8 +124,7 @@ class Navigation:
         if Navigation.current_menu == "exp_hack":
             return
         Navigation.exp()
-        Inputs.click(*coords.EXP_HACK_MENU)
-        time.sleep(userset.SHORT_SLEEP)
+        Navigation.click_settle(*coords.EXP_HACK_MENU, userset.SHORT_SLEEP)
         Navigation.current_menu = "exp_hack"
     
     @staticmethod
@@ -122,8 +132,7 @@ class Navigation:
         """Click info 'n stuff."""
         if Navigation.current_menu == 'info':
             return
-        Inputs.click(*coords.INFO)
-        time.sleep(userset.SHORT_SLEEP)
+        Navigation.click_settle(*coords.INFO, userset.SHORT_SLEEP)
         Navigation.current_menu = 'info'
     
     @staticmethod
@@ -132,8 +141,7 @@ class Navigation:
         if Navigation.current_menu == 'misc':
             return
         Navigation.info()
-        Inputs.click(*coords.MISC)
-        time.sleep(userset.SHORT_SLEEP)
+        Navigation.click_settle(*coords.MISC, userset.SHORT_SLEEP)
         Navigation.current_menu = 'misc'
     
     @staticmethod
@@ -142,8 +150,7 @@ class Navigation:
         if Navigation.current_menu == 'perks':
             return
         Navigation.menu('adventure')
-        Inputs.click(*coords.ITOPOD_PERKS)
-        time.sleep(userset.SHORT_SLEEP)
+        Navigation.click_settle(*coords.ITOPOD_PERKS, userset.SHORT_SLEEP)
         Navigation.current_menu = 'perks'
     
     @staticmethod
@@ -152,8 +159,7 @@ class Navigation:
         if Navigation.current_menu == 'spells':
             return
         Navigation.menu('bloodmagic')
-        Inputs.click(*coords.BM_SPELL)
-        time.sleep(userset.SHORT_SLEEP)
+        Navigation.click_settle(*coords.BM_SPELL, userset.SHORT_SLEEP)
         Navigation.current_menu = 'spells'
     
     @staticmethod
@@ -161,8 +167,7 @@ class Navigation:
         """Navigate to sellout shop."""
         if Navigation.current_menu == 'sellout':
             return
-        Inputs.click(*coords.SELLOUT)
-        time.sleep(userset.SHORT_SLEEP)
+        Navigation.click_settle(*coords.SELLOUT, userset.SHORT_SLEEP)
         Navigation.current_menu = "sellout"
     
     @staticmethod
@@ -171,8 +176,7 @@ class Navigation:
         if Navigation.current_menu == 'boost_2':
             return
         Navigation.sellout()
-        Inputs.click(*coords.SELLOUT_BOOST_2)
-        time.sleep(userset.SHORT_SLEEP)
+        Navigation.click_settle(*coords.SELLOUT_BOOST_2, userset.SHORT_SLEEP)
         Navigation.current_menu = "boost_2"
     
     @staticmethod
@@ -181,6 +185,5 @@ class Navigation:
         if Navigation.current_menu == 'stat_breakdown':
             return
         Navigation.misc()
-        Inputs.click(*coords.STAT_BREAKDOWN)
-        time.sleep(userset.SHORT_SLEEP)
+        Navigation.click_settle(*coords.STAT_BREAKDOWN, userset.SHORT_SLEEP)
         Navigation.current_menu = 'stat_breakdown'
@@ -0,0 +1,188 @@
+"""OCR class runs tesseract and remembers what it read from an image."""
+import hashlib
+import threading
+
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from PIL import Image as image
+import pytesseract
+
+try:
+    import tesserocr
+except ImportError:
+    # pytesseract is used instead, see OCR.image_to_string()
+    tesserocr = None
+
+import usersettings as userset
+
+
+class OCR:
+    """Runs tesseract and keeps a least recently used cache of its results.
+
+    With userset.OCR_BACKEND set to "tesserocr", tesseract is loaded into
+    the process once and reused for every read. Otherwise, or if tesserocr
+    isn't installed, pytesseract starts a tesseract process for every read.
+
+    Polling loops OCR the same pixels over and over, like a quest text that
+    hasn't changed yet. Every read is keyed by a hash of the image bytes and
+    the settings it is read with, so reading identical pixels again costs a
+    hash instead of a tesseract run.
+    """
+
+    # Columns of tesseract's TSV output, see image_to_data()
+    TSV_COLUMNS = ["level", "page_num", "block_num", "par_num", "line_num", "word_num",
+                   "left", "top", "width", "height", "conf", "text"]
+    # Key -> text, oldest first
+    cache = OrderedDict()
+    hits = 0
+    misses = 0
+    # Reads can run on several threads, see Inputs.ocr_bitmaps()
+    lock = threading.Lock()
+    # Loaded tesseract engines of every thread, keyed by config
+    engines = threading.local()
+    # Set once loading tesserocr failed, pytesseract is used from then on
+    fallback = False
+
+    @staticmethod
+    def parse_config(config :str) -> Dict[str, str]:
+        """Turn a tesseract command line config into engine variables.
+
+        "--psm 6 -c tessedit_char_whitelist=0123456789" becomes
+        {"psm": "6", "tessedit_char_whitelist": "0123456789"}.
+        """
+        options = {}
+        words = config.split()
+        for flag, value in zip(words, words[1:]):
+            if flag == "--psm":
+                options["psm"] = value
+            elif flag == "-c" and "=" in value:
+                name, value = value.split("=", 1)
+                options[name] = value
+        return options
+
+    @staticmethod
+    def engine(config :str) -> Optional["tesserocr.PyTessBaseAPI"]:
+        """Return this thread's loaded engine for a config.
+
+        Returns None if pytesseract should be used instead. Engines aren't
+        thread safe, so every thread loads its own.
+        """
+        if getattr(userset, "OCR_BACKEND", "pytesseract") != "tesserocr" or OCR.fallback:
+            return None
+        engines = getattr(OCR.engines, "apis", None)
+        if engines is None:
+            engines = OCR.engines.apis = {}
+        api = engines.get(config)
+        if api is not None:
+            return api
+        if tesserocr is None:
+            print("tesserocr isn't installed, using pytesseract instead")
+            OCR.fallback = True
+            return None
+
+        options = OCR.parse_config(config)
+        try:
+            # PSM only holds the constants, it can't be called with a value
+            psm = int(options.pop("psm", tesserocr.PSM.SINGLE_BLOCK))
+            tessdata = getattr(userset, "TESSDATA_PATH", "")
+            if tessdata:
+                api = tesserocr.PyTessBaseAPI(path=tessdata, psm=psm)
+            else:
+                api = tesserocr.PyTessBaseAPI(psm=psm)
+        except (RuntimeError, ValueError, TypeError) as e:
+            print(f"Couldn't load tesseract with tesserocr, using pytesseract instead: {e}")
+            OCR.fallback = True
+            return None
+        for name, value in options.items():
+            api.SetVariable(name, value)
+        engines[config] = api
+        return api
+
+    @staticmethod
+    def image_to_string(bmp :image, config :str) -> str:
+        """Return the text tesseract reads in an image.
+
+        Keyword arguments
+        bmp    -- The image, already filtered for OCR.
+        config -- Tesseract command line options. With tesserocr only --psm
+                  and -c variables are supported.
+        """
+        api = OCR.engine(config)
+        if api is None:
+            return pytesseract.image_to_string(bmp, config=config)
+        api.SetImage(bmp)
+        return api.GetUTF8Text()
+
+    @staticmethod
+    def image_to_data(bmp :image, config :str) -> List[Dict[str, str]]:
+        """Return every word tesseract finds in an image.
+
+        Every word is a dict with the columns of tesseract's TSV output, see
+        TSV_COLUMNS. Rows that aren't words have a "conf" of -1.
+        """
+        api = OCR.engine(config)
+        if api is None:
+            rows = pytesseract.image_to_data(bmp, config=config).splitlines()[1:]
+        else:
+            api.SetImage(bmp)
+            rows = api.GetTSVText(0).splitlines()
+        words = []
+        for row in rows:
+            values = row.split("\t")
+            words.append(dict(zip(OCR.TSV_COLUMNS, values + [""] * (len(OCR.TSV_COLUMNS) - len(values)))))
+        return words
+
+    @staticmethod
+    def key(bmp :image, *settings) -> bytes:
+        """Return the cache key for an image read with the given settings.
+
+        Keyword arguments
+        bmp      -- The image before it is filtered for OCR.
+        settings -- Everything else that changes the result, like the filter
+                    settings and the tesseract config.
+        """
+        h = hashlib.blake2b(digest_size=16)
+        h.update(repr((bmp.mode, bmp.size, settings)).encode())
+        h.update(bmp.tobytes())
+        return h.digest()
+
+    @staticmethod
+    def get(key :bytes) -> Optional[str]:
+        """Return the remembered text for a key, or None on a miss."""
+        with OCR.lock:
+            text = OCR.cache.get(key)
+            if text is None:
+                OCR.misses += 1
+                return None
+            OCR.hits += 1
+            OCR.cache.move_to_end(key)
+            return text
+
+    @staticmethod
+    def put(key :bytes, text :str) -> None:
+        """Remember the text for a key, dropping the oldest results if full."""
+        size = getattr(userset, "OCR_CACHE_SIZE", 0)
+        if size <= 0:
+            return
+        with OCR.lock:
+            OCR.cache[key] = text
+            OCR.cache.move_to_end(key)
+            while len(OCR.cache) > size:
+                OCR.cache.popitem(last=False)
+
+    @staticmethod
+    def clear() -> None:
+        """Forget every result and reset the counters."""
+        with OCR.lock:
+            OCR.cache.clear()
+            OCR.hits = 0
+            OCR.misses = 0
+
+    @staticmethod
+    def report() -> str:
+        """Return a line with the cache's hit rate."""
+        total = OCR.hits + OCR.misses
+        rate = OCR.hits / total if total else 0
+        return (f"OCR cache: {OCR.hits} hits, {OCR.misses} misses ({rate:.0%}), "
+                f"{len(OCR.cache)} results kept")
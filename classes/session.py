@@ -0,0 +1,155 @@
+"""Session class records and replays captured frames and inputs."""
+import json
+import struct
+import time
+import zlib
+
+from typing import Iterable, Optional, Tuple
+
+import numpy
+
+MAGIC = b"NGUSESS1"
+# Every record starts with its kind, the seconds since the session started
+# and the length of the payload that follows.
+RECORD = struct.Struct("<cdI")
+# Frame payloads start with the width, height and whether it's a keyframe.
+FRAME = struct.Struct("<HH?")
+# Store a full frame every this many frames.
+KEYFRAME_INTERVAL = 300
+
+
+class Session:
+    """Records frames and inputs to a session file, or replays them.
+
+    Frames are stored as the XOR against the previous frame and compressed
+    with zlib, so parts of the screen that didn't change take up almost no
+    space. A full frame is stored every KEYFRAME_INTERVAL frames and when
+    the window is resized.
+
+    While replaying, captures are served the recorded frames in order. Every
+    input advances the session to the point after the same input in the
+    recording, so a script that captures more or less often than the
+    recorded one still sees the frames that followed each of its inputs.
+    """
+
+    def __init__(self, path :str, replaying :bool =False) -> None:
+        self.path = path
+        self.replaying = replaying
+        self.start = time.time()
+        self.frames = 0
+        self.inputs = 0
+        self.mismatches = 0
+        self.previous = None  # Last frame written or read, without the X channel
+        self.frame = None     # Frame currently served while replaying
+        self.pending = None   # Record read ahead while replaying
+        if replaying:
+            self.file = open(path, "rb")
+            if self.file.read(len(MAGIC)) != MAGIC:
+                self.file.close()
+                raise RuntimeError(f"{path} is not a session file")
+        else:
+            self.file = open(path, "wb")
+            self.file.write(MAGIC)
+
+    def close(self) -> None:
+        """Close the session file."""
+        self.file.close()
+
+    def write(self, kind :bytes, payload :bytes) -> None:
+        """Write a record to the session file."""
+        self.file.write(RECORD.pack(kind, time.time() - self.start, len(payload)))
+        self.file.write(payload)
+
+    def add_frame(self, frame :numpy.ndarray) -> None:
+        """Record a BGRX frame."""
+        bgr = numpy.ascontiguousarray(frame[..., :3])
+        h, w = bgr.shape[:2]
+        key = (self.previous is None or self.previous.shape != bgr.shape or
+               self.frames % KEYFRAME_INTERVAL == 0)
+        data = bgr if key else numpy.bitwise_xor(bgr, self.previous)
+        self.write(b"F", FRAME.pack(w, h, key) + zlib.compress(data.tobytes(), 1))
+        self.previous = bgr
+        self.frames += 1
+
+    def add_input(self, name :str, args :Iterable) -> None:
+        """Record an input, name is the Inputs method that sent it."""
+        self.write(b"I", json.dumps([name, list(args)]).encode())
+        self.inputs += 1
+
+    def add_window(self, window_id :int, x :int, y :int) -> None:
+        """Record the window id and top left coordinates of the game."""
+        self.write(b"W", json.dumps([window_id, x, y]).encode())
+
+    def read(self) -> Optional[Tuple[bytes, float, bytes]]:
+        """Read the next record as (kind, time, payload), None at the end."""
+        if self.pending is not None:
+            record, self.pending = self.pending, None
+            return record
+        header = self.file.read(RECORD.size)
+        if len(header) < RECORD.size:
+            return None
+        kind, t, length = RECORD.unpack(header)
+        return kind, t, self.file.read(length)
+
+    def peek(self) -> Optional[Tuple[bytes, float, bytes]]:
+        """Return the next record without consuming it."""
+        if self.pending is None:
+            self.pending = self.read()
+        return self.pending
+
+    def decode_frame(self, payload :bytes) -> None:
+        """Decode a frame record and make it the frame being served."""
+        w, h, key = FRAME.unpack_from(payload)
+        data = zlib.decompress(payload[FRAME.size:])
+        bgr = numpy.frombuffer(data, dtype=numpy.uint8).reshape(h, w, 3)
+        if not key:
+            bgr = numpy.bitwise_xor(bgr, self.previous)
+        self.previous = bgr
+        self.frame = numpy.zeros((h, w, 4), dtype=numpy.uint8)
+        self.frame[..., :3] = bgr
+        self.frames += 1
+
+    def next_frame(self) -> numpy.ndarray:
+        """Return the next recorded frame as BGRX.
+
+        Frames are never served past the next recorded input, the last frame
+        before it is repeated instead.
+        """
+        record = self.peek()
+        if record is not None and record[0] == b"F":
+            self.read()
+            self.decode_frame(record[2])
+        if self.frame is None:
+            raise EOFError("No frames left to replay")
+        return self.frame
+
+    def advance(self, name :str, args :Iterable) -> None:
+        """Skip to the point right after the next recorded input.
+
+        Inputs that don't match the recorded one are counted in mismatches.
+        """
+        while True:
+            record = self.read()
+            if record is None:
+                raise EOFError("Reached the end of the replayed session")
+            kind, _, payload = record
+            if kind == b"F":
+                self.decode_frame(payload)
+            elif kind == b"I":
+                self.inputs += 1
+                if json.loads(payload) != json.loads(json.dumps([name, list(args)])):
+                    self.mismatches += 1
+                return
+
+    def window(self) -> Tuple[int, int, int]:
+        """Skip to the recorded window and return its (id, x, y)."""
+        while True:
+            record = self.read()
+            if record is None:
+                raise EOFError("The session doesn't contain a game window")
+            kind, _, payload = record
+            if kind == b"F":
+                self.decode_frame(payload)
+            elif kind == b"W":
+                window_id, x, y = json.loads(payload)
+                return window_id, x, y
@@ -0,0 +1,198 @@
+"""Slots class recognizes inventory items by the icon in their slot."""
+import json
+import os
+
+from typing import Dict, Iterable, List, Optional
+
+import cv2
+import numpy
+
+from classes.inputs import Inputs
+from classes.window import Window
+
+import coordinates as coords
+
+
+class Slots:
+    """Classifies the items on an inventory page from a single capture.
+
+    The page is cut into its slots and the icon in every slot is reduced to
+    a 64 bit difference hash, which is looked up in an index of known items.
+    The index is learned: when a page holds icons that aren't in it yet, the
+    page is template matched once against every item template, and the
+    fingerprints of the matched slots are stored. Icons that match none of
+    the templates are OTHER for the rest of the run, but aren't saved, so a
+    template that missed once gets another try next run. Empty slots are
+    recognized by their flat color.
+    """
+
+    EMPTY = "empty"
+    OTHER = "other"
+    # Fingerprints this many bits apart still count as the same icon
+    MAX_DISTANCE = 6
+    # Half the size of the icon area in a slot, leaving out the slot border
+    ICON_RADIUS = 20
+    # Templates tried when learning new icons
+    templates = coords.QUESTING_FILENAMES + coords.GLOP_FILENAMES
+    index_file = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                              "slot_index.json")
+    # Fingerprint -> item name
+    items = {}
+    # Fingerprint -> {property: bool}, see get_property(). Only True is saved
+    properties = {}
+    loaded = False
+
+    @staticmethod
+    def load() -> None:
+        """Load the index, if it has been saved before."""
+        Slots.loaded = True
+        try:
+            with open(Slots.index_file) as f:
+                index = json.load(f)
+            # Indexes saved by older versions also hold misses, those are dropped
+            Slots.items = {int(k, 16): v for k, v in index["items"].items() if v != Slots.OTHER}
+            Slots.properties = {int(k, 16): {p: True for p, known in v.items() if known is True}
+                                for k, v in index["properties"].items()}
+        except (OSError, ValueError, KeyError, AttributeError):
+            Slots.items = {}
+            Slots.properties = {}
+
+    @staticmethod
+    def save() -> None:
+        """Save the index for the next run, leaving out misses."""
+        properties = {k: {p: True for p, known in v.items() if known is True}
+                      for k, v in Slots.properties.items()}
+        index = {"items": {f"{k:016x}": v for k, v in Slots.items.items() if v != Slots.OTHER},
+                 "properties": {f"{k:016x}": v for k, v in properties.items() if v}}
+        try:
+            with open(Slots.index_file, "w") as f:
+                json.dump(index, f)
+        except OSError:
+            print("Couldn't save the inventory slot index")
+
+    @staticmethod
+    def center(slot :int) -> coords.Pixel:
+        """Return the center of a slot, numbered from 1 like get_inventory_slots()."""
+        row, column = divmod(slot - 1, coords.INVENTORY_COLUMNS)
+        return coords.Pixel(coords.INVENTORY_SLOTS.x + (column + 1) * 50,
+                            coords.INVENTORY_SLOTS.y + row * 50)
+
+    @staticmethod
+    def get_icon(slot :int) -> numpy.ndarray:
+        """Return the grayscale icon in a slot, from the cached frame."""
+        r = Slots.ICON_RADIUS
+        x, y = Slots.center(slot)
+        return Inputs.get_search_area(Window.x + x - r, Window.y + y - r,
+                                      Window.x + x + r, Window.y + y + r)
+
+    @staticmethod
+    def get_icons() -> List[numpy.ndarray]:
+        """Return the icon in every slot on the page, see get_icon()."""
+        return [Slots.get_icon(slot) for slot in range(1, coords.INVENTORY_COLUMNS * coords.INVENTORY_ROWS + 1)]
+
+    @staticmethod
+    def fingerprint(icon :numpy.ndarray) -> int:
+        """Return the 64 bit difference hash of an icon."""
+        small = cv2.resize(icon, (9, 8), interpolation=cv2.INTER_AREA)
+        bits = small[:, 1:] > small[:, :-1]
+        return int.from_bytes(numpy.packbits(bits).tobytes(), "big")
+
+    @staticmethod
+    def lookup(fingerprint :int) -> Optional[str]:
+        """Return the item with this fingerprint, or the closest one within MAX_DISTANCE."""
+        if fingerprint in Slots.items:
+            return Slots.items[fingerprint]
+        best, distance = None, Slots.MAX_DISTANCE + 1
+        for known, name in Slots.items.items():
+            d = bin(fingerprint ^ known).count("1")
+            if d < distance:
+                best, distance = name, d
+        return best
+
+    @staticmethod
+    def classify(learn :bool =True) -> List[Optional[str]]:
+        """Return the item in every slot on the current inventory page.
+
+        Items are template names, EMPTY or OTHER. Slots are in the same
+        order as get_inventory_slots(), so slot n is at index n - 1.
+
+        Keyword arguments
+        learn -- Template match the page if it holds unknown icons, and add
+                 them to the index. Otherwise unknown icons are None.
+        """
+        if not Slots.loaded:
+            Slots.load()
+        icons = Slots.get_icons()
+        names = []
+        fingerprints = []
+        for icon in icons:
+            fingerprint = Slots.fingerprint(icon)
+            fingerprints.append(fingerprint)
+            if icon.std() < 6:
+                names.append(Slots.EMPTY)
+            else:
+                names.append(Slots.lookup(fingerprint))
+
+        if learn and None in names:
+            Slots.learn(names, fingerprints)
+        return names
+
+    @staticmethod
+    def learn(names :List[Optional[str]], fingerprints :List[int]) -> None:
+        """Template match the page and add the unknown slots to the index.
+
+        Slots that match no template are remembered as OTHER for this run
+        only, see save().
+        """
+        first, last = Slots.center(1), Slots.center(len(names))
+        x_start, y_start = Window.x + first.x - 25, Window.y + first.y - 25
+        roi = (x_start, y_start, Window.x + last.x + 25, Window.y + last.y + 25)
+        matches = Inputs.match_many(None, Slots.templates, 0.9, roi)
+        for name, hits in matches.items():
+            for hit in hits:
+                # Slot containing the center of the match
+                column = (hit.x + hit.w // 2) // 50
+                row = (hit.y + hit.h // 2) // 50
+                slot = row * coords.INVENTORY_COLUMNS + column
+                if 0 <= slot < len(names) and names[slot] is None:
+                    names[slot] = name
+                    Slots.items[fingerprints[slot]] = name
+        for slot, name in enumerate(names):
+            if name is None:
+                names[slot] = Slots.OTHER
+                Slots.items[fingerprints[slot]] = Slots.OTHER
+        Slots.save()
+
+    @staticmethod
+    def find(items :Iterable[str]) -> Dict[str, List[int]]:
+        """Return the slots holding each of the items on the current page.
+
+        Slots are numbered from 1 like get_inventory_slots().
+        """
+        found = {item: [] for item in items}
+        for slot, name in enumerate(Slots.classify(), start=1):
+            if name in found:
+                found[name].append(slot)
+        return found
+
+    @staticmethod
+    def get_property(fingerprint :int, prop :str) -> Optional[bool]:
+        """Return a remembered property of an icon, None if it's unknown.
+
+        Properties are anything that takes more than a look at the icon to
+        find out, like whether the item's tooltip says it's transformable.
+        Only True is kept between runs, False is forgotten once the run ends
+        so a check that failed by accident isn't stuck for good.
+        """
+        if not Slots.loaded:
+            Slots.load()
+        return Slots.properties.get(fingerprint, {}).get(prop)
+
+    @staticmethod
+    def set_property(fingerprint :int, prop :str, value :bool) -> None:
+        """Remember a property of an icon, see get_property()."""
+        if not Slots.loaded:
+            Slots.load()
+        Slots.properties.setdefault(fingerprint, {})[prop] = value
+        if value:
+            Slots.save()
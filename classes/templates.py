@@ -0,0 +1,71 @@
+"""Templates class keeps the images used for template matching in memory."""
+import os
+
+import cv2
+import numpy
+
+
+class Templates:
+    """Registry of grayscale templates, loaded from images/ once.
+
+    Templates are keyed by their file name, so "q1.png" is images/q1.png.
+    Every lookup compares the file's modification time with the one it was
+    loaded with, and loads the file again if it changed.
+    """
+
+    directory = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "images")
+    # (path, scale) -> (mtime, template)
+    cache = {}
+    preloaded = False
+
+    @staticmethod
+    def path(name :str) -> str:
+        """Return the path of a template, names without a directory are in images/."""
+        if os.path.dirname(name):
+            return name
+        return os.path.join(Templates.directory, name)
+
+    @staticmethod
+    def preload(scale :float =1.0) -> None:
+        """Load every image in images/."""
+        Templates.preloaded = True
+        for name in sorted(os.listdir(Templates.directory)):
+            if name.lower().endswith(".png"):
+                Templates.get(name, scale)
+
+    @staticmethod
+    def get(name :str, scale :float =1.0) -> numpy.ndarray:
+        """Return a template as a grayscale numpy array.
+
+        Keyword arguments
+        name  -- The file name of an image in images/, or a path to one.
+        scale -- Resize the template by this factor, the resized template is
+                 kept in memory as well.
+        """
+        if not Templates.preloaded:
+            Templates.preload()
+        path = Templates.path(name)
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            raise FileNotFoundError(f"Template {name} not found at {path}")
+        key = (path, scale)
+        cached = Templates.cache.get(key)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        template = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+        if template is None:
+            raise ValueError(f"Couldn't read template {path}")
+        if scale != 1.0:
+            h, w = template.shape
+            size = (max(1, round(w * scale)), max(1, round(h * scale)))
+            template = cv2.resize(template, size, interpolation=cv2.INTER_AREA)
+        Templates.cache[key] = (mtime, template)
+        return template
+
+    @staticmethod
+    def clear() -> None:
+        """Forget every loaded template."""
+        Templates.cache = {}
+        Templates.preloaded = False
@@ -4,8 +4,9 @@ import math
 
 from classes.stats  import Stats
 from classes.helper import Helper
-from classes.features import Navigation
+from classes.features import Misc, Navigation
 from classes.inputs import Inputs
+from classes.macro import Macro
 
 import coordinates  as coords
 import usersettings as userset
@@ -14,6 +15,19 @@ import usersettings as userset
 class UpgradeEM:
     """Buys things for exp."""
 
+    # Types the amounts into the power, cap and bar boxes and buys them
+    buy_macro = Macro("upgrade_em", [
+        Macro.click(*coords.EM_POW_BOX, gap=userset.MEDIUM_SLEEP),
+        Macro.keys("{power}", gap=userset.MEDIUM_SLEEP),
+        Macro.click(*coords.EM_CAP_BOX, gap=userset.MEDIUM_SLEEP),
+        Macro.keys("{cap}", gap=userset.MEDIUM_SLEEP),
+        Macro.click(*coords.EM_BAR_BOX, gap=userset.MEDIUM_SLEEP),
+        Macro.keys("{bars}", gap=userset.MEDIUM_SLEEP),
+        Macro.click(*coords.EM_POW_BUY, gap=userset.MEDIUM_SLEEP),
+        Macro.click(*coords.EM_CAP_BUY, gap=userset.MEDIUM_SLEEP),
+        Macro.click(*coords.EM_BAR_BUY, gap=userset.MEDIUM_SLEEP),
+    ])
+
     def __init__(self, ecap, mcap, ebar, mbar, e2m_ratio, report=False):
         """Example: Upgrade(37500, 37500, 2, 1).
 
@@ -89,40 +103,13 @@ class UpgradeEM:
         m_bars  = amount * self.mbar
 
         Navigation.exp()
-
-        Inputs.click(*coords.EM_POW_BOX)
-        Inputs.send_string(str(e_power))
-        time.sleep(userset.MEDIUM_SLEEP)
-
-        Inputs.click(*coords.EM_CAP_BOX)
-        Inputs.send_string(str(e_cap))
-        time.sleep(userset.MEDIUM_SLEEP)
-
-        Inputs.click(*coords.EM_BAR_BOX)
-        Inputs.send_string(str(e_bars))
-        time.sleep(userset.MEDIUM_SLEEP)
-
-        Inputs.click(*coords.EM_POW_BUY)
-        Inputs.click(*coords.EM_CAP_BUY)
-        Inputs.click(*coords.EM_BAR_BUY)
+        UpgradeEM.buy_macro.run(power=e_power, cap=e_cap, bars=e_bars)
 
         Navigation.exp_magic()
-
-        Inputs.click(*coords.EM_POW_BOX)
-        Inputs.send_string(str(m_power))
-        time.sleep(userset.MEDIUM_SLEEP)
-
-        Inputs.click(*coords.EM_CAP_BOX)
-        Inputs.send_string(str(m_cap))
-        time.sleep(userset.MEDIUM_SLEEP)
-
-        Inputs.click(*coords.EM_BAR_BOX)
-        Inputs.send_string(str(m_bars))
-        time.sleep(userset.MEDIUM_SLEEP)
-
-        Inputs.click(*coords.EM_POW_BUY)
-        Inputs.click(*coords.EM_CAP_BUY)
-        Inputs.click(*coords.EM_BAR_BUY)
+        UpgradeEM.buy_macro.run(power=m_power, cap=m_cap, bars=m_bars)
+        # Remembered energy and magic breakdowns are outdated now
+        Misc.breakdowns.pop(1, None)
+        Misc.breakdowns.pop(2, None)
 
         Stats.set_value_with_ocr("XP")
 
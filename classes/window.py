@@ -1,8 +1,14 @@
 """Window class contains the coordinate for the top left of the game window."""
 import ctypes
+import json
+import os
 import platform
 
-import win32gui
+try:
+    import win32gui
+except ImportError:
+    # Recorded sessions can still be replayed without pywin32
+    win32gui = None
 
 from deprecated import deprecated
 from typing import Dict, Tuple
@@ -15,6 +21,9 @@ class Window:
     x = 0
     y = 0
     dc = 0
+    # Last found window, used to skip the top left scan on startup
+    cache_file = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                              "window_cache.json")
 
     @deprecated(reason="Window() -Window instantiation- is deprecated, use Window.init() instead")
     def __init__(self, debug=False):
@@ -23,10 +32,7 @@ class Window:
     @staticmethod
     def init(debug :bool =False) -> Dict[int, Tuple[int, int, int, int]]:
         """Finds the game window and returns its coords."""
-        if platform.release() == "10":
-            ctypes.windll.shcore.SetProcessDpiAwareness(2)
-        else:
-            ctypes.windll.user32.SetProcessDPIAware()
+        Window.set_dpi_awareness()
 
         def window_enumeration_handler(hwnd, top_windows):
             """Add window title and ID to array."""
@@ -45,6 +51,56 @@ class Window:
         for window in windows:
             candidates[window] = Window.winRect(window)
         return candidates
+    
+    @staticmethod
+    def set_dpi_awareness() -> None:
+        """Make window coordinates unaffected by Windows scaling."""
+        if platform.release() == "10":
+            ctypes.windll.shcore.SetProcessDpiAwareness(2)
+        else:
+            ctypes.windll.user32.SetProcessDPIAware()
+    
+    @staticmethod
+    def load_cache() -> bool:
+        """Restore the window id and top left coordinates from the last run.
+        
+        Returns False if there's no cache, or if the cached window no longer
+        exists or has been resized. The caller should verify the restored
+        position, as the game might have moved inside the window.
+        """
+        Window.set_dpi_awareness()
+        try:
+            with open(Window.cache_file) as f:
+                cache = json.load(f)
+            window_id = cache["id"]
+            x1, y1, x2, y2 = cache["rect"]
+            x, y = cache["x"], cache["y"]
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+        
+        if not win32gui.IsWindow(window_id):
+            return False
+        left, top, right, bot = Window.winRect(window_id)
+        if (right - left, bot - top) != (x2 - x1, y2 - y1):
+            return False
+        
+        Window.id = window_id
+        Window.setPos(x, y)
+        return True
+    
+    @staticmethod
+    def save_cache() -> None:
+        """Store the window id and top left coordinates for the next run."""
+        cache = {"id": Window.id,
+                 "rect": Window.winRect(Window.id),
+                 "x": Window.x,
+                 "y": Window.y}
+        try:
+            with open(Window.cache_file, "w") as f:
+                json.dump(cache, f)
+        except OSError:
+            print("Couldn't save the window position cache")
+    
     @staticmethod
     def setPos(x :int, y :int) -> None:
         """Set top left coordinates."""
@@ -2,7 +2,6 @@
 from decimal import Decimal
 from functools import reduce
 import math
-import re
 import time
 
 from classes.features   import Misc
@@ -40,54 +39,9 @@ class Wishes:
 
     def get_breakdowns(self):
         """Go to stat breakdowns and fetch the necessary stats."""
-        Navigation.stat_breakdown()
-        Inputs.click(*coords.BREAKDOWN_E)
-        time.sleep(userset.MEDIUM_SLEEP)
-        print("OCR is scanning a large area, this might take a few seconds")
-        e_list = self.fix_text(Inputs.ocr(*coords.OCR_BREAKDOWN))
-        Inputs.click(*coords.BREAKDOWN_M)
-        time.sleep(userset.MEDIUM_SLEEP)
-        m_list = self.fix_text(Inputs.ocr(*coords.OCR_BREAKDOWN))
-        Inputs.click(*coords.BREAKDOWN_R)
-        time.sleep(userset.MEDIUM_SLEEP)
-        r_list = self.fix_text(Inputs.ocr(*coords.OCR_BREAKDOWN))
-        Inputs.click(*coords.BREAKDOWN_MISC)
-        time.sleep(userset.MEDIUM_SLEEP)
-        Inputs.click_drag(*coords.BREAKDOWN_MISC_SCROLL_DRAG_START, *coords.BREAKDOWN_MISC_SCROLL_DRAG_END)
-        misc_list = self.fix_text(Inputs.ocr(*coords.OCR_BREAKDOWN))
-
-        fields = ["total energy power:", "total magic power:", "total r power:", "total wish speed:"]
-
-        try:
-            for e in e_list:
-                if e[0].lower() in fields:
-                    self.epow = float(e[1])
-        except ValueError:
-            print("couldn't fetch energy power")
-            self.epow = 1
-        try:
-            for e in m_list:
-                if e[0].lower() in fields:
-                    self.mpow = float(e[1])
-        except ValueError:
-            print("couldn't fetch magic power")
-            self.mpow = 1
-
-        try:
-            for e in r_list:
-                if e[0].lower() in fields:
-                    self.rpow = float(e[1])
-        except ValueError:
-            print("couldn't fetch R3 power")
-            self.rpow = 1
-        try:
-            for e in misc_list:
-                if e[0].lower() in fields:
-                    self.wish_speed = int(e[1]) / 100
-
-        except ValueError:
-            print("Couldn't fetch wish speed, defaulting to 100%")
-            self.wish_speed = 1
+        breakdown = Misc.get_breakdown(wish_speed=True)
+        self.epow, self.mpow, self.rpow = breakdown.power
+        self.wish_speed = breakdown.wish_speed
 
         if not self.wish_speed:
             print("Couldn't get wish speed")
@@ -106,49 +60,11 @@ class Wishes:
 
     def get_caps(self):
         """Get all available idle resources."""
-        self.ecap = Misc.get_idle_cap(1)
-        self.mcap = Misc.get_idle_cap(2)
-        self.rcap = Misc.get_idle_cap(3)
+        self.ecap, self.mcap, self.rcap = Misc.get_idle_caps()
 
     def fix_text(self, text):
-        """Fix OCR output to something useable."""
-        try:
-            fields = []
-            values = []
-            res = []
-            method = 0
-            for line in text.splitlines():
-                match = re.search(r"[a-zA-Z\s]+:\s*[xX]\s*\d+\%?", line)
-                if match is not None:
-                    method = 1
-                    break
-            if method == 1:
-                for line in text.splitlines():
-                    if line == "":
-                        continue
-                    else:
-                        match = re.match(r"(^[a-zA-Z\s]+:?)", line)
-                        if match is not None:
-                            fields.append(match.group(1))
-                            values.append(Inputs.remove_letters(line))
-            else:
-                for line in text.splitlines():
-
-                    if line == "" or line[0].lower() == "x":
-                        continue
-                    if line[0].isdigit():
-                        values.append(re.sub(r'[^0-9E+\.]', '', line))
-                    else:
-                        fields.append(line)
-            assert len(fields) == len(values)
-
-            for index, field in enumerate(fields):
-                res.append((field, values[index]))
-            return res
-
-        except AssertionError:
-            print("OCR couldn't determine breakdown values")
-            return []
+        """Fix OCR output to something useable, see Misc.parse_breakdown()."""
+        return Misc.parse_breakdown(text)
 
     def get_wish_status(self):
         """Check which wishes are done and which are level 1 or higher."""
@@ -164,25 +80,26 @@ class Wishes:
 
         for i, page in enumerate(coords.WISH_PAGE):
             Inputs.click(*page)
-            for y in range(3):
-                for x in range(7):
-                    border_color = Inputs.get_pixel_color(coords.WISH_BORDER.x + x * 92,
-                                                          coords.WISH_BORDER.y + y * 106)
-                    if border_color == coords.COLOR_WISH_COMPLETED:
-                        self.wishes_completed.append(1 + x + y + y * 6 + i * 21)
-
-                    if border_color == coords.COLOR_WISH_STARTED:
-                        self.wishes_in_progress.append(1 + x + y + y * 6 + i * 21)
-
-                    active_color = Inputs.get_pixel_color(coords.WISH_SELECTION.x + x * 92,
-                                                          coords.WISH_SELECTION.y + y * 106)
-                    if active_color == coords.COLOR_WISH_ACTIVE:
-                        self.wishes_active.append(1 + x + y + y * 6 + i * 21)
-                    if active_color == coords.COLOR_WISH_INACTIVE:
-                        Inputs.click(coords.WISH_SELECTION.x + x * 92,
-                                     coords.WISH_SELECTION.y + y * 106)
-                        Inputs.click(*coords.WISH_CLEAR_WISH)
-                        self.wishes_in_progress.append(1 + x + y + y * 6 + i * 21)
+            grid = [(x, y) for y in range(3) for x in range(7)]
+            borders = [(coords.WISH_BORDER.x + x * 92, coords.WISH_BORDER.y + y * 106) for x, y in grid]
+            selections = [(coords.WISH_SELECTION.x + x * 92, coords.WISH_SELECTION.y + y * 106) for x, y in grid]
+            colors = Inputs.get_pixel_colors(borders + selections)
+            for j, (x, y) in enumerate(grid):
+                border_color = colors[j]
+                if border_color == coords.COLOR_WISH_COMPLETED:
+                    self.wishes_completed.append(1 + x + y + y * 6 + i * 21)
+
+                if border_color == coords.COLOR_WISH_STARTED:
+                    self.wishes_in_progress.append(1 + x + y + y * 6 + i * 21)
+
+                active_color = colors[j + len(grid)]
+                if active_color == coords.COLOR_WISH_ACTIVE:
+                    self.wishes_active.append(1 + x + y + y * 6 + i * 21)
+                if active_color == coords.COLOR_WISH_INACTIVE:
+                    Inputs.click(coords.WISH_SELECTION.x + x * 92,
+                                 coords.WISH_SELECTION.y + y * 106)
+                    Inputs.click(*coords.WISH_CLEAR_WISH)
+                    self.wishes_in_progress.append(1 + x + y + y * 6 + i * 21)
 
             if i == 0:  # after page 1 is scanned, select first wish
                 Inputs.click(*coords.WISH_PORTRAIT)
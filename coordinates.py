@@ -136,6 +136,9 @@ MENU_ITEMS = {
     'questing': MENU_QUESTING, 'hacks': MENU_HACKS, 'wishes': MENU_WISHES,
 }
 NUMBER_INPUT_BOX = Pixel(440, 20)
+NUMBER_INPUT_AREA = OCRBox(380, 10, 500, 30)
+# Area right of the menu buttons, watched to see when a menu has finished loading
+MENU_AREA = OCRBox(310, 30, 960, 600)
 EXP = Pixel(90, 450)
 SAVE = Pixel(23, 483)
 
@@ -171,6 +174,8 @@ LOADOUT = {1: Pixel(330, LOADOUT_Y), 2: Pixel(360, LOADOUT_Y), 3: Pixel(390, LOA
            6: Pixel(480, LOADOUT_Y), 7: Pixel(510, LOADOUT_Y), 8: Pixel(540, LOADOUT_Y), 9: Pixel(570, LOADOUT_Y), 10: Pixel(600, LOADOUT_Y)}
 
 INVENTORY_SLOTS = Pixel(300, 330)
+INVENTORY_COLUMNS = 12
+INVENTORY_ROWS = 5
 INVENTORY_AREA = OCRBox(315, 290, 930, 560)
 INVENTORY_PAGE_Y = 574
 INVENTORY_PAGE = [Pixel(364, INVENTORY_PAGE_Y), Pixel(428, INVENTORY_PAGE_Y), Pixel(492, INVENTORY_PAGE_Y), Pixel(560, INVENTORY_PAGE_Y), Pixel(620, INVENTORY_PAGE_Y), Pixel(685, INVENTORY_PAGE_Y)]
@@ -0,0 +1,109 @@
+"""Learn the game's pixel font from labeled crops and check how well it reads.
+
+First save crops of OCR boxes with the game open on the menu that shows
+them. Every crop is labeled with what tesseract reads in it, so check the
+labels in glyph_crops/labels.json and fix the wrong ones. Then learn the
+glyph table from the crops, and validate it against them. The table is
+learned from scratch every time, so fixed labels replace the old glyphs.
+Learned glyphs are saved to glyph_table.json, which Inputs.ocr() uses for
+reads with glyphs=True. Include crops with spaces in them, otherwise text
+with spaces is left to tesseract.
+
+    python learn_glyphs.py save OCR_PP OCR_BOSS
+    python learn_glyphs.py learn
+    python learn_glyphs.py validate
+"""
+from classes.glyphs import Glyphs
+from classes.helper import Helper
+from classes.inputs import Inputs
+from classes.window import Window
+
+import coordinates as coords
+
+import argparse
+import datetime
+import json
+import os
+import time
+
+import cv2
+
+parser = argparse.ArgumentParser()
+parser.add_argument("command", choices=["save", "learn", "validate"], help="what to do with the crops")
+parser.add_argument("boxes", nargs="*", help="OCR boxes in coordinates.py to save crops of, like OCR_PP")
+parser.add_argument("-d", "--directory", default="glyph_crops", help="directory with the crops and labels.json")
+args = parser.parse_args()
+
+labels_file = os.path.join(args.directory, "labels.json")
+
+
+def load_labels() -> dict:
+    """Return the label of every crop, by file name."""
+    try:
+        with open(labels_file) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save() -> None:
+    """Save a crop of every box, labeled with what tesseract reads."""
+    Helper.init(True)
+    os.makedirs(args.directory, exist_ok=True)
+    labels = load_labels()
+    stamp = datetime.datetime.now().strftime('%d-%m-%y-%H-%M-%S')
+    for name in args.boxes:
+        box = getattr(coords, name)
+        area = cv2.cvtColor(Inputs.get_region(box.x1 + Window.x, box.y1 + Window.y,
+                                              box.x2 + Window.x, box.y2 + Window.y),
+                            cv2.COLOR_BGRA2GRAY)
+        file = f"{name}-{stamp}.png"
+        cv2.imwrite(os.path.join(args.directory, file), area)
+        labels[file] = Inputs.ocr(*box).strip()
+        print(f"{file}: {labels[file]!r}")
+    with open(labels_file, "w") as f:
+        json.dump(labels, f, indent=4)
+
+
+def learn() -> None:
+    """Learn the table from every labeled crop."""
+    Glyphs.clear()
+    for file, label in load_labels().items():
+        area = cv2.imread(os.path.join(args.directory, file), cv2.IMREAD_GRAYSCALE)
+        if area is None:
+            print(f"{file}: couldn't read the crop")
+        elif not Glyphs.learn(area, label):
+            glyphs, gaps = Glyphs.segment(area)
+            print(f"{file}: found {len(glyphs)} glyphs with gaps {gaps} for {label!r}, skipped")
+    Glyphs.save()
+    counts = Glyphs.characters()
+    print("Learned " + ", ".join(f"{char!r} x{n}" for char, n in sorted(counts.items())))
+    print(f"Gaps up to {Glyphs.letter_gap} are inside words, spaces start at {Glyphs.space_gap}")
+
+
+def validate() -> None:
+    """Read every labeled crop and compare the result with its label."""
+    correct = total = 0
+    elapsed = 0.0
+    for file, label in load_labels().items():
+        area = cv2.imread(os.path.join(args.directory, file), cv2.IMREAD_GRAYSCALE)
+        if area is None:
+            continue
+        start = time.perf_counter()
+        text = Glyphs.read(area)
+        elapsed += time.perf_counter() - start
+        total += 1
+        if text is not None and text.split() == label.split():
+            correct += 1
+        else:
+            print(f"{file}: read {text!r} instead of {label!r}")
+    if total:
+        print(f"{correct}/{total} crops read correctly, {elapsed / total * 1000:.3f}ms per read")
+
+
+if args.command == "save":
+    save()
+elif args.command == "learn":
+    learn()
+else:
+    validate()
@@ -7,7 +7,7 @@ from classes.features import Adventure
 from classes.helper   import Helper
 from classes.inputs import Inputs
 from classes.navigation import Navigation
-from classes.window import Window
+from classes.slots import Slots
 import coordinates as coords
 import usersettings as userset
 
@@ -51,14 +51,10 @@ class Glop:
         for page in range(Glop.inv_pages_unlocked):
             Inputs.click(*coords.INVENTORY_PAGE[page])
             time.sleep(userset.LONG_SLEEP)
-            bmp = Inputs.get_bitmap()
+            found = Slots.find(coords.GLOP_FILENAMES)
             
             for item in coords.GLOP_FILENAMES:
-                path = Inputs.get_file_path("images", item)
-                # Using the whole window instead of cropping out just the inventory yields higher accuracy
-                rect = (Window.x, Window.y, Window.x + 960, Window.y + 600)
-                res = Inputs.find_all(*rect, path, threshold=0.9, bmp=bmp)
-                reagents = list(map(lambda x: Reagent(x[0], x[1], item, page), res))
+                reagents = [Reagent(*Slots.center(slot), item, page) for slot in found[item]]
                 if reagents: Glop.reagents[item].extend(reagents)
         
         print("\nScan found these glop reagents\n")
@@ -0,0 +1,49 @@
+"""Record a script's frames and inputs to a session file, or replay one.
+
+Replaying doesn't need the game or pywin32, the script sees the recorded
+frames and its inputs are compared with the recorded ones instead of sent.
+
+    python sessions.py record itopod.ngus itopod_snipe.py
+    python sessions.py replay itopod.ngus itopod_snipe.py
+"""
+from classes.inputs import Inputs
+from classes.macro import Macro
+from classes.ocr import OCR
+
+import argparse
+import runpy
+import sys
+import time
+
+parser = argparse.ArgumentParser()
+parser.add_argument("mode", choices=["record", "replay"], help="record or replay a session")
+parser.add_argument("session", help="path to the session file")
+parser.add_argument("script", help="script to run")
+parser.add_argument("args", nargs=argparse.REMAINDER, help="arguments passed to the script")
+args = parser.parse_args()
+
+if args.mode == "record":
+    session = Inputs.record_session(args.session)
+else:
+    session = Inputs.replay_session(args.session)
+
+sys.argv = [args.script] + args.args
+start = time.time()
+try:
+    runpy.run_path(args.script, run_name="__main__")
+except EOFError as e:
+    print(e)
+except KeyboardInterrupt:
+    pass
+finally:
+    Inputs.end_session()
+    elapsed = time.time() - start
+    print(f"{args.mode.capitalize()}ed {session.frames} frames and {session.inputs} inputs in {elapsed:.1f}s")
+    if session.replaying:
+        print(f"{session.mismatches} inputs differed from the recording")
+    if Macro.stats:
+        print(Macro.report())
+    if Inputs.search_stats:
+        print(Inputs.search_report())
+    if OCR.hits or OCR.misses:
+        print(OCR.report())
@@ -5,6 +5,34 @@ FAST_SLEEP = 0.06
 SHORT_SLEEP = 0.15
 MEDIUM_SLEEP = 0.3
 LONG_SLEEP = 0.4
+# Menu changes wait until the screen has looked the same for this long (in
+# seconds) instead of sleeping. The sleeps above are still the longest wait.
+SETTLE_TIME = 0.05
+# Send clicks and key presses from a background thread, so scripts don't wait
+# for every click's sleep. Anything reading the screen still waits for all
+# queued inputs to be sent first.
+ASYNC_INPUT = False
+
+# CAPTURE
+# How long (in seconds) a captured frame can be reused by pixel checks, image
+# searches and OCR before a new one is taken. Any input always forces a new
+# capture. Set to 0 to read every pixel directly from the window.
+FRAME_CACHE_MAX_AGE = 0.05
+# Frames per second captured on a background thread while sniping, so the
+# kill loops never wait for a capture. Set to 0 to disable.
+CAPTURE_RATE = 0
+
+# OCR
+# How many OCR results are kept in memory. Reading pixels that were read
+# before returns the same text without running tesseract. Set to 0 to disable.
+OCR_CACHE_SIZE = 256
+# "tesserocr" keeps tesseract loaded for the whole run instead of starting it
+# for every read, which makes small reads several times faster. It needs
+# tesserocr installed (pip install tesserocr), otherwise "pytesseract" is used.
+OCR_BACKEND = "pytesseract"
+# Path to tesseract's tessdata folder for tesserocr, if it doesn't find it on
+# its own. For example "C:\\Program Files\\Tesseract-OCR\\tessdata"
+TESSDATA_PATH = ""
 
 # How long to farm blood for spell casting (in seconds)
 SPELL = 300
@@ -15,3 +43,6 @@ INFO_URL = ""
 
 # STATS
 E_RATE_KEEP_RUNS = 60
+# How long (in seconds) power, bars and cap read from the stat breakdown are
+# reused before they're read again. Rebirthing always reads them again.
+BREAKDOWN_MAX_AGE = 300